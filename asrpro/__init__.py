@@ -43,9 +43,27 @@ def enable_debug_logging():
         handler.setLevel(logging.DEBUG)
     logger.debug("Debug logging enabled")
 
-# 导入关键功能以方便访问
-from .processor import AudioProcessor
-from .cli import main as cli_main
+# 重量级依赖 (numpy, scipy, pydub, webrtcvad) 在首次访问时才导入，
+# 使 import asrpro、asrpro --version 和短生命周期的工作进程启动更快
+_LAZY_ATTRIBUTES = {
+    'AudioProcessor': ('.processor', 'AudioProcessor'),
+    'cli_main': ('.cli', 'main'),
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+        value = getattr(importlib.import_module(module_name, __name__), attribute)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 # 简化导入路径
 __all__ = [
@@ -55,6 +73,3 @@ __all__ = [
     'enable_debug_logging',
     'logger'
 ]
-
-# 包初始化信息
-logger.info(f"ASRPro v{__version__} initialized")
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""增量处理缓存：按输入内容哈希和处理参数记录已生成的输出，重复运行时只处理有变化的文件"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 缓存目录（位于输出目录内）
+CACHE_DIRNAME = ".asrpro-cache"
+# 中间结果 PCM 的默认容量上限 (MB)
+DEFAULT_PCM_LIMIT_MB = 4096
+# 并行计算内容哈希的线程数（哈希计算和文件读取都不占用 GIL）
+HASH_THREADS = 8
+# 输出记录最多积累多久才提交一次 (秒)
+COMMIT_INTERVAL = 5.0
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _digest_or_error(path):
+    try:
+        return file_digest(path)
+    except OSError as e:
+        return e
+
+
+def _params_key(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class ProcessingCache:
+    """输出目录中的 SQLite 清单
+
+    - files: 输入文件路径、大小、修改时间 -> 内容哈希（大小和修改时间不变时不重新读取文件）
+    - outputs: (内容哈希, 处理参数) -> 输出文件及其大小、修改时间
+    - 中间结果：处理完成、编码之前的16kHz PCM，按 (内容哈希, DSP参数) 保存，
+      只改变输出格式时直接重新编码；超出容量上限时按最近使用时间淘汰
+
+    每个分片使用独立的清单文件（分片按路径划分，各自只记录自己的文件），
+    多台机器共享输出目录时不会同时写入同一个数据库。
+    """
+
+    def __init__(self, output_dir, processor, shard=None, pcm_limit_mb=DEFAULT_PCM_LIMIT_MB):
+        """
+        :param shard: (i, N)，当前运行的分片
+        :param pcm_limit_mb: 中间结果 PCM 的容量上限 (MB)，None 为不限制
+        """
+        self.output_dir = output_dir
+        self.root = os.path.join(output_dir, CACHE_DIRNAME)
+        self.pcm_dir = os.path.join(self.root, "pcm")
+        self.pcm_limit_mb = pcm_limit_mb
+        os.makedirs(self.pcm_dir, exist_ok=True)
+
+        dsp_params = processor._dsp_params()
+        self.dsp_key = _params_key(dsp_params)
+        output_params = dict(dsp_params, output_format=processor.output_format)
+        output_params["export"] = processor._export_params()
+        if processor.segmentation:
+            output_params["segmentation"] = dict(processor.segmentation._asdict())
+        self.params_key = _params_key(output_params)
+
+        # 本次运行中使用过的 PCM（淘汰时跳过）
+        self._used = set()
+        self._started = time.time()
+        self._last_commit = time.monotonic()
+
+        name = "manifest.sqlite" if shard is None else f"manifest-{shard[0]}-of-{shard[1]}.sqlite"
+        # 输出目录可能位于网络文件系统上，WAL 依赖共享内存，因此使用回滚日志；
+        # 其他进程持有写锁时最多等待 busy timeout
+        self.db = sqlite3.connect(os.path.join(self.root, name), timeout=60)
+        self.db.execute("PRAGMA journal_mode=DELETE")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                input_path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS outputs (
+                content_hash TEXT,
+                params_key TEXT,
+                output_name TEXT,
+                size INTEGER,
+                mtime_ns INTEGER,
+                PRIMARY KEY (content_hash, params_key, output_name)
+            );
+        """)
+        self.db.commit()
+
+    def content_hash(self, input_path):
+        """返回输入文件的内容哈希"""
+        digest = self.content_hashes([input_path])[input_path]
+        if isinstance(digest, OSError):
+            raise digest
+        return digest
+
+    def content_hashes(self, input_paths, threads=HASH_THREADS):
+        """返回 {输入路径: 内容哈希}，无法读取的文件对应其 OSError
+
+        大小和修改时间未变的文件直接使用清单中的哈希；其余文件在线程池中并行计算，
+        新的哈希在同一个事务中写入清单（共享文件系统上每次提交都要同步到磁盘）。
+        """
+        results = {}
+        pending = []
+        for path in input_paths:
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                results[path] = e
+                continue
+            row = self.db.execute(
+                "SELECT size, mtime_ns, content_hash FROM files WHERE input_path = ?", (os.path.abspath(path),)
+            ).fetchone()
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                results[path] = row[2]
+            else:
+                pending.append((path, stat))
+        if not pending:
+            return results
+
+        with ThreadPoolExecutor(max_workers=max(threads, 1)) as executor:
+            digests = list(executor.map(_digest_or_error, [path for path, _ in pending]))
+        rows = []
+        for (path, stat), digest in zip(pending, digests):
+            results[path] = digest
+            if not isinstance(digest, OSError):
+                rows.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns, digest))
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", rows)
+        return results
+
+    def is_current(self, content_hash, output_name):
+        """输出文件是否已由相同输入和参数生成且未被修改"""
+        row = self.db.execute(
+            "SELECT size, mtime_ns FROM outputs WHERE content_hash = ? AND params_key = ? AND output_name = ?",
+            (content_hash, self.params_key, output_name)
+        ).fetchone()
+        if not row:
+            return False
+        try:
+            stat = os.stat(os.path.join(self.output_dir, output_name))
+        except OSError:
+            return False
+        return row[0] == stat.st_size and row[1] == stat.st_mtime_ns
+
+    def pcm_path(self, content_hash):
+        """中间结果 PCM 的缓存路径（文件不一定存在）"""
+        return os.path.join(self.pcm_dir, f"{content_hash}-{self.dsp_key}.pcm")
+
+    def record(self, content_hash, output_name):
+        """记录新生成的输出文件（每隔 COMMIT_INTERVAL 秒批量提交，关闭时提交剩余记录）"""
+        stat = os.stat(os.path.join(self.output_dir, output_name))
+        self.db.execute(
+            "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?)",
+            (content_hash, self.params_key, output_name, stat.st_size, stat.st_mtime_ns)
+        )
+        if time.monotonic() - self._last_commit >= COMMIT_INTERVAL:
+            self.db.commit()
+            self._last_commit = time.monotonic()
+        # 修改时间即最近使用时间
+        pcm_path = self.pcm_path(content_hash)
+        if os.path.exists(pcm_path):
+            os.utime(pcm_path)
+            self._used.add(pcm_path)
+
+    def prune(self):
+        """按最近使用时间淘汰中间结果 PCM，直到总大小不超过上限，返回删除的文件数
+
+        本次运行中使用过的文件，以及本次运行开始后才被修改的文件
+        （可能正被共享输出目录的其他分片使用）不会被删除。
+        """
+        if self.pcm_limit_mb is None:
+            return 0
+        entries = []
+        total = 0
+        for name in os.listdir(self.pcm_dir):
+            path = os.path.join(self.pcm_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            total += stat.st_size
+            if path not in self._used and stat.st_mtime < self._started:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        limit = self.pcm_limit_mb * 2 ** 20
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
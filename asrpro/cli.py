@@ -2,11 +2,22 @@ import argparse
 import sys
 import os
 import logging
-from .processor import AudioProcessor
+from . import __version__
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    # 只查询版本时不导入任何重量级依赖
+    if argv in (["--version"], ["-V"]):
+        print(f"asrpro {__version__}")
+        return
+    # 子命令在位置参数之前分派
+    if argv and argv[0] == "serve":
+        return serve_main(argv[1:])
 
-def main():
     parser = argparse.ArgumentParser(
         description="ASR Audio Preprocessor - Optimize audio files for child speech recognition",
+        epilog="Run 'asrpro serve --help' for the real-time streaming server.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     
@@ -26,6 +37,12 @@ def main():
         help="Enable verbose logging for debugging"
     )
     
+    parser.add_argument(
+        "-V", "--version",
+        action="version",
+        version=f"asrpro {__version__}"
+    )
+    
     parser.add_argument(
         "-f", "--format",
         default="mp3",
@@ -33,10 +50,135 @@ def main():
         help="Output audio format"
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Number of parallel worker processes (0 uses all CPU cores)"
+    )
+    
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Process files in fixed-size blocks so memory use does not grow with file length"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip files whose outputs are up to date (cache kept in the output directory)"
+    )
+    
+    parser.add_argument(
+        "--cache-limit",
+        type=int,
+        default=4096,
+        metavar="MB",
+        help="Size limit for the intermediate audio kept by --incremental; least recently used "
+             "entries are evicted after each run"
+    )
+    
+    parser.add_argument(
+        "--direct-output",
+        action="store_true",
+        help="Write outputs directly to the output directory instead of via temporary files"
+    )
+    
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="Write a JSON run report with per-stage timings and memory to PATH"
+    )
+    
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Overlap decoding and encoding (thread pools driving ffmpeg) with DSP in this process"
+    )
+    
+    parser.add_argument(
+        "--decode-threads",
+        type=int,
+        default=2,
+        help="Decoder threads in pipelined mode"
+    )
+    
+    parser.add_argument(
+        "--encode-threads",
+        type=int,
+        default=2,
+        help="Encoder threads in pipelined mode"
+    )
+    
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=4,
+        help="Maximum decoded files waiting for DSP, and processed files waiting for encoding, in pipelined mode"
+    )
+    
+    parser.add_argument(
+        "--segment",
+        choices=["clips", "concat"],
+        help="Export only speech regions, as one file per region (clips) or one concatenated file, "
+             "plus a <name>.segments.json manifest of original-time offsets"
+    )
+    
+    parser.add_argument(
+        "--padding-ms",
+        type=int,
+        default=200,
+        help="Audio kept before and after each speech region when segmenting"
+    )
+    
+    parser.add_argument(
+        "--min-speech-ms",
+        type=int,
+        default=250,
+        help="Drop speech regions shorter than this when segmenting"
+    )
+    
+    parser.add_argument(
+        "--max-gap-ms",
+        type=int,
+        default=300,
+        help="Merge speech regions separated by at most this much when segmenting"
+    )
+    
+    parser.add_argument(
+        "-r", "--recursive",
+        action="store_true",
+        help="Process files in subdirectories too, mirroring the directory layout in the output"
+    )
+    
+    parser.add_argument(
+        "--ext",
+        metavar="EXT[,EXT...]",
+        help="Only process files with these extensions, e.g. wav,mp3,flac"
+    )
+    
+    parser.add_argument(
+        "--file-list",
+        metavar="PATH",
+        help="Process the files listed in PATH (one path per line, relative to the input directory)"
+    )
+    
+    parser.add_argument(
+        "--shard",
+        metavar="i/N",
+        help="Only process shard i of N (0 <= i < N), partitioned by a hash of each file's relative path"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep a checkpoint journal in the output directory and skip files completed by earlier runs"
+    )
+    
+    args = parser.parse_args(argv)
     
     # 设置日志级别
-    logger = logging.getLogger("ASRProcessor")
+    logger = logging.getLogger("ChildSpeechProcessor")
     console_handler = logging.StreamHandler()
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     console_handler.setFormatter(formatter)
@@ -53,5 +195,164 @@ def main():
         logger.error(f"Input directory does not exist: {args.input}")
         sys.exit(1)
     
-    processor = AudioProcessor(output_format=args.format)
-    processor.process_directory(args.input, args.output)
\ No newline at end of file
+    if args.workers < 0:
+        logger.error(f"Invalid number of workers: {args.workers}")
+        sys.exit(1)
+    
+    if args.pipelined and (args.streaming or args.workers != 1):
+        logger.error("--pipelined cannot be combined with --streaming or --workers")
+        sys.exit(1)
+    
+    if min(args.decode_threads, args.encode_threads, args.queue_depth) < 1:
+        logger.error("Thread counts and queue depth must be at least 1")
+        sys.exit(1)
+    
+    if args.cache_limit < 0:
+        logger.error(f"Invalid cache limit: {args.cache_limit}")
+        sys.exit(1)
+    
+    if args.file_list and not os.path.isfile(args.file_list):
+        logger.error(f"File list does not exist: {args.file_list}")
+        sys.exit(1)
+    
+    shard = None
+    if args.shard:
+        from .discovery import parse_shard
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            logger.error(str(e))
+            sys.exit(1)
+    
+    extensions = [ext for ext in args.ext.split(",") if ext.strip()] if args.ext else None
+    
+    if min(args.padding_ms, args.min_speech_ms, args.max_gap_ms) < 0:
+        logger.error("Segmentation durations must not be negative")
+        sys.exit(1)
+    
+    segmentation = None
+    if args.segment:
+        from .segments import Segmentation
+        segmentation = Segmentation(args.segment, args.padding_ms, args.min_speech_ms, args.max_gap_ms)
+    
+    # 参数校验通过后才导入处理模块（numpy, scipy, pydub, webrtcvad）
+    from .processor import AudioProcessor
+    processor = AudioProcessor(output_format=args.format, streaming=args.streaming, segmentation=segmentation)
+    processor.process_directory(
+        args.input,
+        args.output,
+        workers=args.workers,
+        incremental=args.incremental,
+        direct_output=args.direct_output,
+        report_path=args.report,
+        pipelined=args.pipelined,
+        decode_threads=args.decode_threads,
+        encode_threads=args.encode_threads,
+        queue_depth=args.queue_depth,
+        recursive=args.recursive,
+        extensions=extensions,
+        file_list=args.file_list,
+        shard=shard,
+        resume=args.resume,
+        cache_limit_mb=args.cache_limit
+    )
+
+
+def serve_main(argv):
+    """asrpro serve：在本地套接字上实时处理多路音频流"""
+    parser = argparse.ArgumentParser(
+        prog="asrpro serve",
+        description="Real-time enhancement server: each connection streams 16kHz mono s16le PCM "
+                    "and receives the enhanced PCM back, delayed by one frame",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="TCP address to listen on"
+    )
+    
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="TCP port to listen on"
+    )
+    
+    parser.add_argument(
+        "--unix",
+        metavar="PATH",
+        help="Listen on a Unix socket at PATH instead of TCP"
+    )
+    
+    parser.add_argument(
+        "--frame-ms",
+        type=int,
+        default=20,
+        choices=[10, 20, 30],
+        help="Frame duration; also the algorithmic latency"
+    )
+    
+    parser.add_argument(
+        "--aggressiveness",
+        type=int,
+        default=3,
+        choices=[1, 2, 3],
+        help="VAD aggressiveness"
+    )
+    
+    parser.add_argument(
+        "--max-streams",
+        type=int,
+        default=256,
+        help="Maximum number of concurrent streams"
+    )
+    
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes running the DSP (0 uses all CPU cores)"
+    )
+    
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=60,
+        help="Seconds between latency/capacity log lines (0 disables)"
+    )
+    
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Enable verbose logging for debugging"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    logger = logging.getLogger("ChildSpeechProcessor")
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(console_handler)
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    
+    if args.max_streams < 1:
+        logger.error(f"Invalid number of streams: {args.max_streams}")
+        sys.exit(1)
+    
+    if args.workers < 0:
+        logger.error(f"Invalid number of workers: {args.workers}")
+        sys.exit(1)
+    
+    from .server import run_server
+    run_server(
+        args.host,
+        args.port,
+        args.unix,
+        frame_ms=args.frame_ms,
+        aggressiveness=args.aggressiveness,
+        max_streams=args.max_streams,
+        stats_interval=args.stats_interval,
+        workers=args.workers
+    )
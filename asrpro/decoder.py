@@ -0,0 +1,148 @@
+"""解码层：ffmpeg 直接输出目标采样率的单声道 s16le，已是目标格式的 WAV 则零拷贝内存映射"""
+import os
+import struct
+import threading
+import numpy as np
+import ffmpeg
+from pydub.exceptions import CouldntDecodeError
+
+# WAVE_FORMAT_PCM / WAVE_FORMAT_EXTENSIBLE
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def decode_file(path, sample_rate=16000):
+    """把音频文件解码为单声道 int16 数组
+
+    输入已是 sample_rate 单声道16位PCM WAV 时直接返回只读的 np.memmap，
+    否则由 ffmpeg 完成重采样和声道混合，输出通过管道读入内存。
+    """
+    samples = map_wav_pcm(path, sample_rate)
+    if samples is not None:
+        return samples
+    return _run_ffmpeg(ffmpeg.input(path), sample_rate)
+
+
+def decode_bytes(data, sample_rate=16000):
+    """通过 ffmpeg 管道把内存中的编码音频解码为单声道 int16 数组"""
+    return _run_ffmpeg(ffmpeg.input("pipe:"), sample_rate, data)
+
+
+def iter_decoded_blocks(path, sample_rate=16000, block_size=160000):
+    """逐块读取 ffmpeg 的解码输出，每块 block_size 个样本（最后一块可能更短）"""
+    process = (
+        _output_pcm(ffmpeg.input(path), sample_rate)
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    stderr = StderrReader(process)
+    try:
+        while True:
+            chunk = process.stdout.read(block_size * 2)
+            if not chunk:
+                break
+            yield np.frombuffer(chunk, dtype=np.int16)
+        if process.wait() != 0:
+            raise CouldntDecodeError(
+                f"Decoding failed. ffmpeg returned error code: {process.returncode}\n\n{stderr.text()}"
+            )
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+class StderrReader:
+    """在后台线程中读取子进程的 stderr
+
+    主线程读写 stdout/stdin 时，ffmpeg 的错误输出超过管道缓冲区就会阻塞，双方互相等待；
+    由单独的线程持续读取 stderr 可以避免这种死锁。
+    """
+
+    def __init__(self, process):
+        self._chunks = []
+        self._thread = threading.Thread(target=self._read, args=(process.stderr,), daemon=True)
+        self._thread.start()
+
+    def _read(self, stream):
+        for chunk in iter(lambda: stream.read(1 << 16), b""):
+            self._chunks.append(chunk)
+
+    def text(self):
+        """等待 stderr 关闭（子进程退出）后返回全部内容"""
+        self._thread.join()
+        return b"".join(self._chunks).decode(errors="replace")
+
+
+def map_wav_pcm(path, sample_rate=16000):
+    """若文件是 sample_rate 单声道16位PCM WAV，返回数据块的只读内存映射，否则返回 None"""
+    pcm_range = wav_pcm_range(path, sample_rate)
+    if pcm_range is None:
+        return None
+    offset, count = pcm_range
+    if count == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(count,))
+
+
+def wav_pcm_range(path, sample_rate=16000):
+    """若文件是 sample_rate 单声道16位PCM WAV，返回数据块的 (字节偏移, 样本数)，否则返回 None"""
+    layout = _wav_layout(path)
+    if layout is None:
+        return None
+    format_tag, channels, rate, bits, offset, size = layout
+    if format_tag != _WAVE_FORMAT_PCM or channels != 1 or rate != sample_rate or bits != 16:
+        return None
+    return offset, size // 2
+
+
+def _wav_layout(path):
+    """解析 RIFF/WAVE 头，返回 (格式, 声道数, 采样率, 位深, 数据偏移, 数据长度)"""
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+                return None
+            fmt = None
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    return None
+                chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+                if chunk_id == b"fmt ":
+                    body = f.read(chunk_size)
+                    if len(body) < 16:
+                        return None
+                    format_tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                    if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                        # 子格式 GUID 的前两个字节为实际格式
+                        format_tag = struct.unpack("<H", body[24:26])[0]
+                    fmt = (format_tag, channels, rate, bits)
+                    f.seek(chunk_size & 1, os.SEEK_CUR)
+                elif chunk_id == b"data":
+                    if fmt is None:
+                        return None
+                    offset = f.tell()
+                    # 流式写入的 WAV 可能没有正确填写长度
+                    size = min(chunk_size, file_size - offset)
+                    return fmt + (offset, size)
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+
+
+def _output_pcm(stream, sample_rate):
+    return (
+        stream
+        .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=sample_rate)
+        .global_args("-nostdin", "-loglevel", "error")
+    )
+
+
+def _run_ffmpeg(stream, sample_rate, data=None):
+    try:
+        out, _ = _output_pcm(stream, sample_rate).run(input=data, capture_stdout=True, capture_stderr=True)
+    except ffmpeg.Error as e:
+        raise CouldntDecodeError(f"Decoding failed: {e.stderr.decode(errors='replace')}")
+    return np.frombuffer(out, dtype=np.int16)
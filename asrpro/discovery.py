@@ -0,0 +1,100 @@
+"""输入文件发现：目录遍历、扩展名过滤、文件列表输入和确定性分片"""
+import hashlib
+import os
+
+
+def discover_files(input_dir, recursive=False, extensions=None, exclude=()):
+    """返回输入目录中的文件（相对路径，使用 / 分隔，按路径排序）
+
+    跳过以 . 开头的隐藏文件（如 macOS 生成的 ._foo.wav）。
+
+    :param recursive: 是否遍历子目录（同样跳过以 . 开头的隐藏目录）
+    :param extensions: 只保留这些扩展名的文件（如 {"wav", "mp3"}，不区分大小写）
+    :param exclude: 需要跳过的目录（如位于输入目录内的输出目录）
+    """
+    excluded = {os.path.realpath(path) for path in exclude}
+    files = []
+    if not recursive:
+        for name in os.listdir(input_dir):
+            if not name.startswith(".") and os.path.isfile(os.path.join(input_dir, name)):
+                files.append(name)
+    else:
+        for root, dirs, names in os.walk(input_dir):
+            dirs[:] = [
+                d for d in dirs
+                if not d.startswith(".") and os.path.realpath(os.path.join(root, d)) not in excluded
+            ]
+            for name in names:
+                if not name.startswith("."):
+                    files.append(_relative_path(os.path.join(root, name), input_dir))
+    return sorted(path for path in files if _has_extension(path, extensions))
+
+
+def read_file_list(list_path, input_dir, extensions=None):
+    """读取文件列表（每行一个路径，# 开头为注释），返回 (相对路径列表, 无效条目列表)
+
+    路径可以是相对于输入目录的路径，也可以是输入目录内的绝对路径。
+    与目录遍历相同，只按路径判断是否位于输入目录内（不解析符号链接）。
+    """
+    files, invalid = [], []
+    seen = set()
+    with open(list_path, encoding="utf-8") as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith("#"):
+                continue
+            path = entry if os.path.isabs(entry) else os.path.join(input_dir, entry)
+            rel = _relative_path(path, input_dir)
+            if rel is None:
+                invalid.append((entry, "Outside the input directory"))
+                continue
+            if rel in seen or not _has_extension(rel, extensions):
+                continue
+            seen.add(rel)
+            files.append(rel)
+    return files, invalid
+
+
+def parse_shard(text):
+    """解析 "i/N"（0 <= i < N），返回 (i, N)"""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r}, expected i/N")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {text!r}, expected 0 <= i < N")
+    return index, count
+
+
+def in_shard(path, index, count):
+    """按相对路径的哈希值确定文件所属分片（与文件列表顺序和机器无关）"""
+    digest = hashlib.sha1(path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index
+
+
+def shard_files(files, index, count):
+    """只保留属于第 index 个分片（共 count 个）的文件"""
+    return [path for path in files if in_shard(path, index, count)]
+
+
+def _has_extension(path, extensions):
+    if not extensions:
+        return True
+    return os.path.splitext(path)[1].lstrip(".").lower() in extensions
+
+
+def _relative_path(path, input_dir):
+    """path 相对于输入目录的路径（使用 / 分隔）；不在输入目录内时返回 None"""
+    root = os.path.abspath(input_dir)
+    path = os.path.abspath(path)
+    try:
+        if os.path.commonpath([root, path]) != root or path == root:
+            return None
+    except ValueError:
+        # Windows 上位于不同驱动器
+        return None
+    return _to_posix(os.path.relpath(path, root))
+
+
+def _to_posix(path):
+    return path.replace(os.sep, "/")
@@ -0,0 +1,85 @@
+"""动态范围压缩：NumPy 实现，可逐块处理并在块之间保持压缩器状态"""
+import math
+import numpy as np
+
+# 16位音频的最大幅度（与 pydub 的 max_possible_amplitude 一致）
+MAX_AMPLITUDE = 32768.0
+
+
+class Compressor:
+    """有状态的动态范围压缩器
+
+    参数含义与 pydub 的 compress_dynamic_range 相同。RMS 在 attack 时长的
+    滑动窗口上计算，衰减量以 1ms 为控制周期更新并在样本间线性插值，
+    因此整段处理和任意分块处理的结果完全一致。
+    """
+
+    def __init__(self, sample_rate, threshold=-20.0, ratio=4.0, attack=5.0, release=50.0):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.ratio = ratio
+        self.attack = attack
+        self.release = release
+
+        self.hop = max(int(sample_rate / 1000), 1)
+        self.look = max(int(sample_rate * attack / 1000), 1)
+        self.thresh_rms = MAX_AMPLITUDE * 10 ** (threshold / 20.0)
+        self.slope = 1.0 - 1.0 / ratio
+        self.attack_coef = math.exp(-self.hop / max(sample_rate * attack / 1000, 1))
+        self.release_coef = math.exp(-self.hop / max(sample_rate * release / 1000, 1))
+        self.reset()
+
+    def reset(self):
+        """清除压缩器状态"""
+        self._pos = 0
+        self._tail = np.zeros(0, dtype=np.float64)
+        self._attenuation = 0.0
+        # 当前及前一个控制周期的线性增益
+        self._gains = [1.0, 1.0]
+
+    def process(self, samples):
+        """压缩一块 float32 样本，返回新的 float32 数组"""
+        samples = np.asarray(samples, dtype=np.float32)
+        n = len(samples)
+        if n == 0:
+            return samples.copy()
+
+        pos0 = self._pos
+        hop = self.hop
+        history = np.concatenate([self._tail, samples.astype(np.float64)])
+        offset = len(self._tail) - pos0  # 全局位置 -> history 下标
+        energy = np.concatenate([[0.0], np.cumsum(history * history)])
+
+        # 本块内开始的控制周期：每个周期的增益由该周期之前 attack 时长内的 RMS 决定
+        first = -(-pos0 // hop) * hop
+        points = np.arange(first, pos0 + n, hop)
+        starts = np.maximum(points - self.look, 0)
+        counts = points - starts
+        sums = energy[points + offset] - energy[starts + offset]
+        rms = np.sqrt(np.divide(sums, counts, out=np.zeros(len(points)), where=counts > 0))
+        over_db = np.zeros(len(points))
+        loud = rms > self.thresh_rms
+        over_db[loud] = 20 * np.log10(rms[loud] / self.thresh_rms)
+        targets = (self.slope * over_db).tolist()
+
+        attenuation = self._attenuation
+        attack_coef, release_coef = self.attack_coef, self.release_coef
+        new_gains = []
+        for target in targets:
+            coef = attack_coef if target > attenuation else release_coef
+            attenuation = target + coef * (attenuation - target)
+            new_gains.append(10 ** (-attenuation / 20.0))
+        self._attenuation = attenuation
+
+        # gains[k] 对应全局控制周期 k0 - 1 + k
+        k0 = pos0 // hop
+        gains = np.array(self._gains[:2 if pos0 % hop else 1] + new_gains)
+        positions = np.arange(pos0, pos0 + n)
+        k = positions // hop - k0
+        frac = (positions % hop) / hop
+        envelope = gains[k] + (gains[k + 1] - gains[k]) * frac
+
+        self._pos = pos0 + n
+        self._gains = gains[-2:].tolist() if self._pos % hop else [gains[-1], gains[-1]]
+        self._tail = history[max(len(history) - self.look, 0):]
+        return (samples * envelope).astype(np.float32)
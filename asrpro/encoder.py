@@ -0,0 +1,122 @@
+"""编码层：16kHz单声道 s16le PCM 通过 stdin 管道逐块送入 ffmpeg，编码为输出格式"""
+import os
+import socket
+import numpy as np
+import ffmpeg
+from pydub.exceptions import CouldntEncodeError
+from .decoder import StderrReader
+from .filters import to_pcm_values
+
+# 各输出格式的导出参数（pydub export 与管道编码共用）
+EXPORT_PARAMS = {
+    "wav": {"format": "wav", "codec": "pcm_s16le"},
+    "mp3": {"format": "mp3", "bitrate": "128k"},
+    "flac": {"format": "flac", "parameters": ["-compression_level", "5"]},
+}
+
+
+class PCMEncoder:
+    """一个 ffmpeg 编码子进程，用作上下文管理器：
+
+        with PCMEncoder(output_path, "flac") as encoder:
+            encoder.write(pcm)
+
+    正常退出时等待编码完成；ffmpeg 出错或 with 块中抛出异常时结束子进程并删除不完整的输出文件。
+    """
+
+    def __init__(self, output_path, output_format, sample_rate=16000, gain=0.0):
+        """
+        :param gain: 写入前施加的增益 (dB)
+        """
+        self.output_path = output_path
+        self._factor = np.float32(10 ** (gain / 20)) if gain else None
+        self._process = (
+            ffmpeg
+            .input("pipe:", format="s16le", ac=1, ar=sample_rate)
+            .output(output_path, **encoder_kwargs(EXPORT_PARAMS.get(output_format, {"format": output_format})))
+            .global_args("-nostdin", "-loglevel", "error")
+            .overwrite_output()
+            .run_async(pipe_stdin=True, pipe_stderr=True)
+        )
+        self._stderr = StderrReader(self._process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, pcm):
+        """写入一块 int16 样本（数组或16位PCM字节），返回实际送入编码器的字节"""
+        if isinstance(pcm, np.ndarray):
+            if self._factor is not None:
+                pcm = to_pcm_values(pcm.astype(np.float32) * self._factor)
+            data = pcm.astype("<i2").tobytes()
+        else:
+            if self._factor is not None:
+                return self.write(np.frombuffer(pcm, dtype="<i2"))
+            data = pcm
+        try:
+            self._process.stdin.write(data)
+        except BrokenPipeError:
+            # ffmpeg 提前退出
+            self._process.wait()
+            raise CouldntEncodeError(f"Encoding failed: {self._stderr.text()}")
+        return data
+
+    def close(self):
+        """结束输入并等待编码完成，返回输出文件路径"""
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self._process.wait() != 0:
+            self._remove_output()
+            raise CouldntEncodeError(
+                f"Encoding failed. ffmpeg returned error code: {self._process.returncode}\n\n{self._stderr.text()}"
+            )
+        return self.output_path
+
+    def abort(self):
+        """结束子进程并删除不完整的输出文件"""
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._remove_output()
+
+    def _remove_output(self):
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+
+def encode_pcm_data(data, output_path, output_format, sample_rate=16000):
+    """把内存中的16位单声道PCM（字节或 int16 数组）编码为输出格式，返回输出文件路径"""
+    with PCMEncoder(output_path, output_format, sample_rate) as encoder:
+        encoder.write(data)
+    return output_path
+
+
+def encoder_kwargs(params):
+    """把 pydub export 参数转换为 ffmpeg-python 的输出参数"""
+    kwargs = {"format": params["format"]}
+    if "codec" in params:
+        kwargs["acodec"] = params["codec"]
+    if "bitrate" in params:
+        kwargs["audio_bitrate"] = params["bitrate"]
+    extra = params.get("parameters", [])
+    for flag, value in zip(extra[::2], extra[1::2]):
+        kwargs[flag.lstrip("-")] = value
+    return kwargs
+
+
+def partial_path(path):
+    """与 path 同目录的临时文件名（包含主机名和进程号，多台机器共享文件系统时也不会冲突）"""
+    return f"{path}.{socket.gethostname()}.{os.getpid()}.part"
@@ -0,0 +1,63 @@
+"""检查点日志：逐行追加每个文件的处理结果，中断后重新运行时跳过已完成的文件"""
+import datetime
+import json
+import os
+
+
+class CheckpointJournal:
+    """JSON Lines 格式的追加日志
+
+    每个分片使用独立的日志文件，多台机器共享输出目录时互不干扰。
+    每条记录写入后立即刷新；进程崩溃时最后一行可能不完整，读取时忽略。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._completed = self._load()
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            # 结束不完整的最后一行，否则下一条记录会接在它后面而无法解析
+            self._file.write("\n")
+            self._file.flush()
+
+    def _load(self):
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("status") == "done":
+                    completed[entry["file"]] = entry.get("output")
+                else:
+                    completed.pop(entry.get("file"), None)
+        return completed
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def is_done(self, filename, output_name):
+        """该文件是否已在之前的运行中生成了同名输出"""
+        return self._completed.get(filename) == output_name
+
+    def record_done(self, filename, output_name):
+        self._completed[filename] = output_name
+        self._write({"file": filename, "status": "done", "output": output_name})
+
+    def record_failed(self, filename, error):
+        self._completed.pop(filename, None)
+        self._write({"file": filename, "status": "failed", "error": error})
+
+    def _write(self, entry):
+        entry["time"] = datetime.datetime.now().isoformat(timespec="seconds")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,143 @@
+"""流水线批处理：解码、DSP 和编码分别在不同的阶段并行进行
+
+- 解码：线程池预取后续文件（ffmpeg 子进程，等待管道时不占用 GIL）
+- DSP：在调用线程中按文件顺序执行（使用同一个 AudioProcessor，每个文件新建 VAD 实例）
+- 编码：线程池把处理后的 PCM 通过管道送入 ffmpeg 子进程
+
+两个队列都有长度上限，内存占用约为 (2 * queue_depth + 1) 个文件的 PCM。
+"""
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+from pydub.exceptions import CouldntDecodeError
+from .decoder import decode_file
+from .encoder import encode_pcm_data
+from .profiling import NULL_PROFILER, StageProfiler
+
+
+class StagedPipeline:
+    """以流水线方式处理 process_directory 的任务列表"""
+
+    def __init__(self, processor, decode_threads=2, encode_threads=2, queue_depth=4):
+        """
+        :param decode_threads: 解码线程数
+        :param encode_threads: 编码线程数（每个线程驱动一个 ffmpeg 子进程）
+        :param queue_depth: 预取（已解码待处理）和待编码队列的最大长度
+        """
+        self.processor = processor
+        self.decode_threads = max(decode_threads, 1)
+        self.encode_threads = max(encode_threads, 1)
+        self.queue_depth = max(queue_depth, 1)
+        self.logger = processor.logger
+
+    def run(self, tasks, profile=False):
+        """按完成顺序逐个返回 (文件名, 输出文件路径, 错误信息, 剖析记录)
+
+        tasks 的格式与 process_directory 相同：
+        (文件名, 输入路径, 中间PCM路径, 是否复用已缓存的PCM, 直接输出路径)
+        """
+        pending = iter(tasks)
+        decoding = deque()
+        encoding = {}
+        self.logger.info(
+            f"Pipelined processing with {self.decode_threads} decoder and "
+            f"{self.encode_threads} encoder threads (queue depth {self.queue_depth})"
+        )
+        with ThreadPoolExecutor(self.decode_threads, thread_name_prefix="asrpro-decode") as decoders, \
+                ThreadPoolExecutor(self.encode_threads, thread_name_prefix="asrpro-encode") as encoders:
+
+            def prefetch():
+                while len(decoding) < self.queue_depth:
+                    task = next(pending, None)
+                    if task is None:
+                        return
+                    profiler = StageProfiler(active_only=True) if profile else NULL_PROFILER
+                    decoding.append((task, profiler, decoders.submit(self._decode, task, profiler)))
+
+            prefetch()
+            while decoding:
+                task, profiler, future = decoding.popleft()
+                prefetch()
+                filename, input_path, pcm_path, reuse_pcm, output_path = task
+                try:
+                    pcm = future.result()
+                    if reuse_pcm:
+                        # 缓存的PCM原样送去编码（字节视图，不复制）
+                        data, vad_result = memoryview(pcm).cast("B"), None
+                    else:
+                        data, vad_result = self._process(input_path, pcm, profiler)
+                except Exception as e:
+                    yield (filename, None) + self._failure(input_path, e)
+                    continue
+
+                # 编码队列已满时先等待完成的编码任务
+                while len(encoding) >= self.queue_depth:
+                    yield from self._collect(encoding, block=True)
+                job = encoders.submit(
+                    self._encode, data, vad_result, input_path,
+                    pcm_path if not reuse_pcm else None, output_path, profiler
+                )
+                encoding[job] = (filename, input_path, profiler)
+                yield from self._collect(encoding, block=False)
+
+            while encoding:
+                yield from self._collect(encoding, block=True)
+
+    def _decode(self, task, profiler):
+        """解码线程：返回16kHz单声道 int16 数组（复用缓存时直接读取缓存的PCM）"""
+        _, input_path, pcm_path, reuse_pcm, _ = task
+        with profiler.stage("decode"):
+            if reuse_pcm:
+                self.logger.info(f"Re-encoding cached audio: {pcm_path}")
+                pcm = np.fromfile(pcm_path, dtype=np.int16)
+            else:
+                pcm = decode_file(input_path, self.processor.SAMPLE_RATE)
+        profiler.set_audio_seconds(len(pcm) / self.processor.SAMPLE_RATE)
+        return pcm
+
+    def _process(self, input_path, pcm, profiler):
+        """DSP阶段（调用线程）：返回 (处理后的16位PCM字节, VAD结果)"""
+        processor = self.processor
+        processor.logger.info(f"Processing child speech: {input_path}")
+        processor.profiler = profiler
+        try:
+            audio, vad_result = processor._process_pcm(pcm)
+            return audio.raw_data, vad_result
+        finally:
+            processor.profiler = NULL_PROFILER
+
+    def _encode(self, data, vad_result, input_path, pcm_path, output_path, profiler):
+        """编码线程：保存中间PCM（如需要）并编码，返回输出文件路径"""
+        processor = self.processor
+        with profiler.stage("export"):
+            if pcm_path:
+                processor._save_pcm(data, pcm_path)
+            if processor.segmentation:
+                samples = np.frombuffer(data, dtype=np.int16)
+                return processor._export_segments(samples, vad_result, input_path, output_path)
+            if output_path is None:
+                temp_fd, output_path = tempfile.mkstemp(suffix=f".{processor.output_format}")
+                os.close(temp_fd)
+            return encode_pcm_data(data, output_path, processor.output_format, processor.SAMPLE_RATE)
+
+    def _collect(self, encoding, block):
+        """返回已完成的编码任务的结果；block 为真时至少等待一个完成"""
+        done, _ = wait(list(encoding), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for job in done:
+            filename, input_path, profiler = encoding.pop(job)
+            try:
+                path = job.result()
+            except Exception as e:
+                yield (filename, None) + self._failure(input_path, e)
+                continue
+            yield filename, path, None, profiler.result(input_path) if profiler is not NULL_PROFILER else None
+
+    def _failure(self, input_path, error):
+        """与 _process_file 相同的错误记录方式，返回 (错误信息, 剖析记录)"""
+        if isinstance(error, CouldntDecodeError):
+            self.logger.error(f"Audio decoding failed: {input_path}")
+            return "Audio decoding failed", None
+        self.logger.error(f"Audio processing error: {str(error)}")
+        return str(error), None
@@ -1,52 +1,91 @@
+import errno
 import os
 import tempfile
 import logging
 import shutil
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import gcd, log
 import numpy as np
+from scipy.signal import resample_poly
 from pydub import AudioSegment
 from pydub.silence import detect_nonsilent
 from pydub.exceptions import CouldntDecodeError
 import webrtcvad
+from .filters import FilterChain, INT16_MIN, INT16_MAX, VOICE_ENHANCEMENT_SPEC, noise_reduction_spec
+from .dynamics import Compressor
+from .vad import VADResult, detect_speech_frames, speech_gain_envelope
+from .decoder import decode_bytes, decode_file
+from .encoder import EXPORT_PARAMS, partial_path
+from .profiling import NULL_PROFILER, RunReport, StageProfiler
+from .cache import DEFAULT_PCM_LIMIT_MB
+
+# DSP 算法版本：任何改变处理结果的修改都要递增（增量缓存据此使旧结果失效）
+DSP_VERSION = 1
+
+# process_array / process_bytes 的返回值
+ProcessedAudio = namedtuple("ProcessedAudio", ["samples", "sample_rate", "vad"])
 
 class AudioProcessor:
-    def __init__(self, output_format="wav", aggressiveness=3):
+    # 预处理参数
+    SAMPLE_RATE = 16000
+    VAD_FRAME_MS = 30
+    SPEECH_GAIN = 1.0
+    NON_SPEECH_GAIN = 0.3
+    SMOOTHING_TAPS = 50
+    COMPRESSOR_PARAMS = {"threshold": -45.0, "ratio": 3.0, "attack": 10.0, "release": 200.0}
+
+    def __init__(self, output_format="wav", aggressiveness=3, streaming=False, block_seconds=10,
+                 segmentation=None):
         """
         :param output_format: 输出格式 (wav, mp3, flac)
         :param aggressiveness: VAD攻击性级别 (1-3, 3最激进)
+        :param streaming: 是否使用分块流式处理（内存占用与文件长度无关）
+        :param block_seconds: 流式处理的块长度（秒）
+        :param segmentation: segments.Segmentation 参数；指定时只导出语音段并生成清单
         """
         self.output_format = output_format
         self.aggressiveness = min(max(aggressiveness, 1), 3)
+        self.streaming = streaming
+        self.block_seconds = block_seconds
+        self.segmentation = segmentation
         self.logger = logging.getLogger("ChildSpeechProcessor")
-        self.vad = webrtcvad.Vad(self.aggressiveness)
+        # 各阶段耗时记录（仅在生成运行报告时启用）
+        self.profiler = NULL_PROFILER
+
+    def _config(self):
+        """返回可在工作进程中重建处理器的构造参数"""
+        return {
+            "output_format": self.output_format,
+            "aggressiveness": self.aggressiveness,
+            "streaming": self.streaming,
+            "block_seconds": self.block_seconds,
+            "segmentation": self.segmentation,
+        }
+
+    def _dsp_params(self):
+        """影响处理后PCM的全部参数（增量缓存的键）"""
+        return {
+            "dsp_version": DSP_VERSION,
+            "aggressiveness": self.aggressiveness,
+            "streaming": self.streaming,
+            "block_seconds": self.block_seconds if self.streaming else None,
+            "sample_rate": self.SAMPLE_RATE,
+            "vad_frame_ms": self.VAD_FRAME_MS,
+            "speech_gain": self.SPEECH_GAIN,
+            "non_speech_gain": self.NON_SPEECH_GAIN,
+            "smoothing_taps": self.SMOOTHING_TAPS,
+            "compressor": self.COMPRESSOR_PARAMS,
+        }
+
+    def _export_params(self):
+        """当前输出格式的导出参数"""
+        return EXPORT_PARAMS.get(self.output_format, {"format": self.output_format})
     
     def preprocess_audio(self, input_path):
         """针对儿童语音优化的预处理流程"""
         try:
-            self.logger.info(f"Processing child speech: {input_path}")
-            
-            # 1. 加载并基础处理
-            audio = AudioSegment.from_file(input_path)
-            audio = audio.set_channels(1).set_frame_rate(16000)
-            
-            # 2. 儿童语音专用噪声抑制
-            audio = self._child_specific_noise_reduction(audio)
-            
-            # 3. 增强型VAD（针对高音调优化）
-            audio = self._enhanced_child_vad(audio)
-            
-            # 4. 儿童语音动态增强
-            audio = self._child_voice_enhancement(audio)
-            
-            # 5. 感知加权归一化
-            audio = self._perceptual_normalization(audio)
-            
-            # 调试信息
-            if self.logger.level <= logging.DEBUG:
-                self._print_audio_stats(audio)
-
-            # 导出处理后的音频
-            return self._export_processed_audio(audio)
-
+            return self._run_pipeline(input_path)
         except CouldntDecodeError:
             self.logger.error(f"Audio decoding failed: {input_path}")
             return None
@@ -54,123 +93,271 @@ class AudioProcessor:
             self.logger.error(f"Audio processing error: {str(e)}")
             return None
 
+    def process_array(self, samples, sample_rate, dtype=np.int16):
+        """在内存中处理样本数组，不读写磁盘
+
+        :param samples: 一维（单声道）或二维 (样本数, 声道数) 数组；
+                        整数按其位宽满量程，浮点数按 [-1, 1] 满量程
+        :param sample_rate: 输入采样率
+        :param dtype: 输出类型，np.int16 或 np.float32（范围 [-1, 1]）
+        :return: ProcessedAudio(16kHz单声道样本, 采样率, VADResult)
+        """
+        audio, vad_result = self._process_pcm(self._prepare_array(samples, sample_rate))
+
+        output = np.frombuffer(audio.raw_data, dtype=np.int16)
+        if np.dtype(dtype) == np.float32:
+            output = output.astype(np.float32) / 32768
+        else:
+            output = output.copy()
+        return ProcessedAudio(output, self.SAMPLE_RATE, vad_result)
+
+    def process_bytes(self, data, sample_rate=None, channels=1, dtype=np.int16):
+        """在内存中处理音频字节
+
+        :param data: 编码后的音频文件内容（sample_rate 为 None 时，由 ffmpeg 通过管道解码），
+                     或交错存储的16位小端PCM（需指定 sample_rate 和 channels）
+        :return: ProcessedAudio，同 process_array
+        """
+        if sample_rate is None:
+            samples, sample_rate = decode_bytes(data, self.SAMPLE_RATE), self.SAMPLE_RATE
+        else:
+            samples = np.frombuffer(data, dtype="<i2").reshape(-1, channels)
+        return self.process_array(samples, sample_rate, dtype=dtype)
+
+    def _prepare_array(self, samples, sample_rate):
+        """混合为单声道并重采样到16kHz，返回 int16 数组"""
+        samples = np.asarray(samples)
+        # 满量程取决于原始类型（混合声道后均为浮点数）
+        if np.issubdtype(samples.dtype, np.signedinteger):
+            scale = 32768 / 2 ** (8 * samples.dtype.itemsize - 1)
+        elif np.issubdtype(samples.dtype, np.floating):
+            scale = 32768
+        else:
+            raise ValueError(f"Unsupported sample dtype: {samples.dtype}")
+
+        if samples.ndim == 2:
+            samples = samples.mean(axis=1)
+        elif samples.ndim != 1:
+            raise ValueError(f"Expected a 1-D or 2-D sample array, got shape {samples.shape}")
+        samples = samples.astype(np.float64) * scale
+
+        if sample_rate != self.SAMPLE_RATE:
+            divisor = gcd(int(sample_rate), self.SAMPLE_RATE)
+            samples = resample_poly(samples, self.SAMPLE_RATE // divisor, int(sample_rate) // divisor)
+        return np.clip(np.rint(samples), INT16_MIN, INT16_MAX).astype(np.int16)
+
+    def _run_pipeline(self, input_path, pcm_path=None, output_path=None):
+        """执行预处理流程，出错时抛出异常（供批处理收集错误信息）
+
+        :param pcm_path: 若指定，同时保存编码前的16位PCM（供增量缓存复用）
+        :param output_path: 若指定，直接写入该路径，否则写入临时文件
+        """
+        self.logger.info(f"Processing child speech: {input_path}")
+
+        if self.streaming:
+            from .streaming import StreamingPipeline
+            return StreamingPipeline(self, self.block_seconds).process_file(input_path, pcm_path, output_path)
+
+        # 1. 解码为16kHz单声道（由 ffmpeg 完成重采样；16kHz单声道WAV直接内存映射）
+        with self.profiler.stage("decode"):
+            pcm = decode_file(input_path, self.SAMPLE_RATE)
+        self.profiler.set_audio_seconds(len(pcm) / self.SAMPLE_RATE)
+        # 降噪阶段直接读取内存映射（只做一次 float32 转换，不先复制为字节串）
+        audio, vad_result = self._process_pcm(pcm)
+
+        # 导出处理后的音频
+        with self.profiler.stage("export"):
+            if pcm_path:
+                self._save_pcm(audio.raw_data, pcm_path)
+            if self.segmentation:
+                samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+                return self._export_segments(samples, vad_result, input_path, output_path)
+            return self._export_processed_audio(audio, output_path)
+
+    def _process_segment(self, audio):
+        """对16kHz单声道音频段执行DSP阶段 (2-5)，返回 (音频段, VADResult)"""
+        return self._process_pcm(np.frombuffer(audio.raw_data, dtype=np.int16))
+
+    def _process_pcm(self, pcm):
+        """对16kHz单声道 int16 样本数组（可以是内存映射）执行DSP阶段 (2-5)，返回 (音频段, VADResult)
+
+        VAD结果通过返回值传递，不保存在实例上：多个线程可以共用同一个 AudioProcessor。
+        """
+        # 2. 儿童语音专用噪声抑制
+        with self.profiler.stage("noise_reduction"):
+            audio = self._reduce_noise(pcm, self.SAMPLE_RATE)
+        
+        # 3. 增强型VAD（针对高音调优化）
+        with self.profiler.stage("vad"):
+            audio, vad_result = self._speech_mask(audio)
+        
+        # 4. 儿童语音动态增强
+        with self.profiler.stage("enhancement"):
+            audio = self._child_voice_enhancement(audio)
+        
+        # 5. 感知加权归一化
+        with self.profiler.stage("normalization"):
+            audio = self._perceptual_normalization(audio)
+        
+        # 调试信息
+        if self.logger.level <= logging.DEBUG:
+            self._print_audio_stats(audio)
+        return audio, vad_result
+
     def _child_specific_noise_reduction(self, audio):
         """针对儿童语音的噪声抑制"""
-        # 保留高频成分（儿童语音特征）
-        filtered = audio.high_pass_filter(150)  # 保留更高频段
+        return self._reduce_noise(np.frombuffer(audio.raw_data, dtype=np.int16), audio.frame_rate)
+
+    def _reduce_noise(self, pcm, frame_rate):
+        """噪声抑制：输入 int16 样本数组，返回音频段"""
+        # 自适应频谱降噪：非常轻柔的语音保留更多高频
+        lowpass_cutoff = 6000 if _dbfs(pcm) < -35 else 5000
         
-        # 自适应频谱降噪
-        if audio.dBFS < -35:  # 非常轻柔的语音
-            filtered = filtered.low_pass_filter(6000)  # 保留更多高频
-        else:
-            filtered = filtered.low_pass_filter(5000)  # 常规高频保留
-            
-        # 针对电子噪声的陷波滤波
-        for freq in [3000, 4000]:  # 常见电子噪声频率
-            filtered = filtered.notch_filter(freq, q=10)
-            
-        return filtered
+        # 高通150Hz（保留儿童语音高频特征）-> 低通 -> 3kHz/4kHz陷波（常见电子噪声）
+        # 整条滤波链在一个 float32 缓冲区上执行
+        chain = FilterChain(noise_reduction_spec(lowpass_cutoff), frame_rate)
+        filtered = chain.process(pcm.astype(np.float32))
+        return self._from_float32(filtered, frame_rate)
 
     def _enhanced_child_vad(self, audio):
         """针对儿童高音调的增强型VAD"""
-        # 转换为适合VAD的格式
-        raw_audio = np.array(audio.get_array_of_samples())
-        sample_rate = audio.frame_rate
-        frame_duration = 30  # ms
-        frames = self._frame_generator(raw_audio, sample_rate, frame_duration)
-        
-        # 检测语音活动
-        speech_frames = []
-        for frame in frames:
-            speech_frames.append(self.vad.is_speech(frame.tobytes(), sample_rate))
+        return self._speech_mask(audio)[0]
+
+    def _speech_mask(self, audio):
+        """VAD软掩码，返回 (音频段, VADResult)"""
+        # 在整段 int16 缓冲区上逐帧判决（结果返回给调用方，供分段导出复用）
+        vad_result = self.detect_speech(audio)
         
-        # 创建语音活动掩码
-        mask = self._create_speech_mask(speech_frames, len(raw_audio), frame_duration, sample_rate)
+        # 帧级增益 -> 样本级平滑包络
+        mask = self._create_speech_mask(vad_result)
         
         # 应用时域掩码（保留语音部分，衰减非语音部分）
-        return self._apply_soft_mask(audio, mask)
+        return self._apply_soft_mask(audio, mask), vad_result
+
+    def detect_speech(self, audio):
+        """对16位单声道音频段做帧级语音检测，返回 VADResult"""
+        pcm = np.frombuffer(audio.raw_data, dtype=np.int16)
+        frames = detect_speech_frames(self._new_vad(), pcm, audio.frame_rate, self.VAD_FRAME_MS)
+        return VADResult(frames, self.VAD_FRAME_MS, audio.frame_rate, len(pcm))
+
+    def _new_vad(self):
+        """新建 webrtcvad 实例
+
+        webrtcvad.Vad 会根据已处理的帧调整噪声估计，每个文件使用新实例，
+        输出才不受之前处理的文件（以及多进程调度顺序）影响。
+        """
+        return webrtcvad.Vad(self.aggressiveness)
 
     def _child_voice_enhancement(self, audio):
         """儿童语音动态增强"""
-        # 第一级压缩：提升轻柔部分
-        compressed = audio.compress_dynamic_range(
-            threshold=-45.0,  # 较低阈值捕捉轻柔语音
-            ratio=3.0,
-            attack=10.0,      # 较慢攻击时间保留自然度
-            release=200.0
-        )
-        
-        # 高频增强（儿童语音特征频率）
-        high_boost = compressed.high_pass_filter(1500).apply_gain(6)  # 增强1.5kHz以上
-        enhanced = compressed.overlay(high_boost)
+        # 第一级压缩：提升轻柔部分（较低阈值捕捉轻柔语音，较慢攻击时间保留自然度）
+        compressor = Compressor(audio.frame_rate, **self.COMPRESSOR_PARAMS)
+        compressed = compressor.process(self._to_float32(audio))
         
-        # 针对尖锐声音的平滑处理
-        return enhanced.low_pass_filter(6500)  # 限制极高频率
+        # 高频增强（增强1.5kHz以上的儿童语音特征频率）+ 6.5kHz低通平滑尖锐声音
+        chain = FilterChain(VOICE_ENHANCEMENT_SPEC, audio.frame_rate)
+        enhanced = chain.process(compressed)
+        return self._from_float32(enhanced, audio.frame_rate)
 
     def _perceptual_normalization(self, audio):
         """针对儿童语音的感知加权归一化"""
-        # 基于感知响度的归一化
-        normalized = audio.normalize(headroom=3)
+        return audio.apply_gain(self._perceptual_gain(audio.max, audio.dBFS))
+
+    def _perceptual_gain(self, peak, dbfs):
+        """根据峰值和整体响度计算归一化增益 (dB)"""
+        if peak == 0:
+            return 0.0
         
-        # 针对安静段落的额外增益
-        if normalized.dBFS < -25:
-            return normalized.apply_gain(6)
-        elif normalized.dBFS < -20:
-            return normalized.apply_gain(3)
-        return normalized
-
-    def _frame_generator(self, audio, sample_rate, frame_duration):
-        """生成音频帧"""
-        frame_size = int(sample_rate * frame_duration / 1000)
-        offset = 0
-        while offset + frame_size < len(audio):
-            yield audio[offset:offset + frame_size]
-            offset += frame_size
-
-    def _create_speech_mask(self, speech_frames, total_samples, frame_duration, sample_rate):
-        """创建语音活动软掩码"""
-        frame_size = int(sample_rate * frame_duration / 1000)
-        mask = np.zeros(total_samples)
+        # 基于感知响度的归一化（峰值留3dB余量）
+        gain = 20 * np.log10(32768 * 10 ** (-3 / 20) / peak)
+        normalized_dbfs = dbfs + gain
         
-        for i, is_speech in enumerate(speech_frames):
-            start = i * frame_size
-            end = min(start + frame_size, total_samples)
-            
-            # 语音区域：增益1.0，非语音区域：增益0.3
-            mask[start:end] = 1.0 if is_speech else 0.3
-            
-        # 添加平滑过渡
-        return np.convolve(mask, np.hanning(50), 'same')
+        # 针对安静段落的额外增益
+        if normalized_dbfs < -25:
+            return gain + 6
+        elif normalized_dbfs < -20:
+            return gain + 3
+        return gain
+
+    def _frame_gains(self, speech_frames):
+        """语音帧增益1.0，非语音帧增益0.3"""
+        return np.where(speech_frames, self.SPEECH_GAIN, self.NON_SPEECH_GAIN).astype(np.float32)
+
+    def _create_speech_mask(self, vad_result):
+        """创建语音活动软掩码（float32，帧边界处平滑过渡）"""
+        if len(vad_result.frames) == 0:
+            return np.zeros(0, dtype=np.float32)
+        envelope = speech_gain_envelope(
+            self._frame_gains(vad_result.frames),
+            vad_result.frame_size,
+            self._smoothing_window()
+        )
+        return envelope[:vad_result.num_samples]
+
+    def _smoothing_window(self):
+        """掩码平滑使用的 Hanning 窗"""
+        return np.hanning(self.SMOOTHING_TAPS)
 
     def _apply_soft_mask(self, audio, mask):
         """应用软掩码到音频"""
-        samples = np.array(audio.get_array_of_samples())
-        masked_samples = samples * mask[:len(samples)]
+        samples = self._to_float32(audio)
+        samples *= mask[:len(samples)]
         
         # 创建新音频段
+        return self._from_float32(samples, audio.frame_rate)
+
+    def _to_float32(self, audio):
+        """将16位单声道音频段转换为 float32 样本数组"""
+        return np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.float32)
+
+    def _from_float32(self, samples, frame_rate):
+        """将 float32 样本数组转换回16位单声道音频段"""
+        pcm = np.clip(np.rint(samples), INT16_MIN, INT16_MAX).astype(np.int16)
         return AudioSegment(
-            masked_samples.tobytes(),
-            frame_rate=audio.frame_rate,
-            sample_width=audio.sample_width,
+            pcm.tobytes(),
+            frame_rate=frame_rate,
+            sample_width=2,
             channels=1
         )
 
-    def _export_processed_audio(self, audio):
-        """导出处理后的音频"""
-        temp_fd, temp_path = tempfile.mkstemp(suffix=f".{self.output_format}")
-        os.close(temp_fd)
+    def _export_processed_audio(self, audio, output_path=None):
+        """导出处理后的音频（未指定输出路径时写入临时文件）"""
+        if output_path is None:
+            temp_fd, output_path = tempfile.mkstemp(suffix=f".{self.output_format}")
+            os.close(temp_fd)
         
         # 儿童语音推荐使用WAV格式保持质量
-        if self.output_format == "wav":
-            audio.export(temp_path, format="wav", codec="pcm_s16le")
-        else:
-            format_params = {
-                "mp3": {"format": "mp3", "bitrate": "128k"},
-                "flac": {"format": "flac", "compression": "5"}
-            }.get(self.output_format, {})
-            audio.export(temp_path, **format_params)
-            
-        return temp_path
+        audio.export(output_path, **self._export_params())
+        return output_path
+
+    def _export_segments(self, samples, vad_result, input_path, manifest_path=None, gain=0.0):
+        """只导出语音段，返回清单文件路径（未指定路径时写入临时目录）"""
+        from .segments import export_segments
+        return export_segments(
+            samples, vad_result, self.segmentation, self.output_format, self.SAMPLE_RATE,
+            manifest_path=manifest_path, source=input_path, gain=gain
+        )
+
+    def _encode_pcm(self, pcm_path, output_path=None):
+        """直接编码已缓存的16位PCM，返回输出文件路径"""
+        self.logger.info(f"Re-encoding cached audio: {pcm_path}")
+        if self.streaming:
+            from .streaming import StreamingPipeline
+            return StreamingPipeline(self, self.block_seconds).encode_pcm(pcm_path, output_path)
+
+        with self.profiler.stage("decode"):
+            with open(pcm_path, "rb") as f:
+                audio = AudioSegment(f.read(), frame_rate=self.SAMPLE_RATE, sample_width=2, channels=1)
+        self.profiler.set_audio_seconds(len(audio.raw_data) / 2 / self.SAMPLE_RATE)
+        with self.profiler.stage("export"):
+            return self._export_processed_audio(audio, output_path)
+
+    def _save_pcm(self, data, pcm_path):
+        """原子地写入PCM文件"""
+        temp_path = partial_path(pcm_path)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, pcm_path)
 
     def _print_audio_stats(self, audio):
         """打印音频统计信息"""
@@ -179,42 +366,311 @@ class AudioProcessor:
                f"sample_rate={audio.frame_rate}Hz, "
                f"dBFS={audio.dBFS:.1f}")
 
-    def process_directory(self, input_dir, output_dir):
-        """处理整个目录的音频文件"""
+    def process_directory(self, input_dir, output_dir, workers=1, incremental=False, direct_output=False,
+                          report_path=None, pipelined=False, decode_threads=2, encode_threads=2, queue_depth=4,
+                          recursive=False, extensions=None, file_list=None, shard=None, resume=False,
+                          cache_limit_mb=DEFAULT_PCM_LIMIT_MB):
+        """处理整个目录的音频文件
+
+        输出文件先写入同一目录下的临时文件，完成后再原子地重命名为最终文件名。
+
+        :param workers: 并行工作进程数 (1为串行处理, 0为使用全部CPU核心)
+        :param incremental: 使用输出目录中的缓存清单，跳过输入内容和参数都未变化的文件
+        :param cache_limit_mb: 增量缓存中间结果 PCM 的容量上限 (MB)，None 为不限制
+        :param direct_output: 直接写入最终输出路径，不经过临时文件
+        :param report_path: 若指定，记录各阶段耗时和内存并写入 JSON 运行报告
+        :param pipelined: 流水线处理：解码线程池预取、当前进程执行DSP、编码线程池驱动 ffmpeg
+                          （不能与多进程或流式模式同时使用）
+        :param decode_threads: 流水线模式的解码线程数
+        :param encode_threads: 流水线模式的编码线程数
+        :param queue_depth: 流水线模式中预取队列和编码队列的最大长度
+        :param recursive: 遍历子目录（输出保持相同的子目录结构）
+        :param extensions: 只处理这些扩展名的文件（如 {"wav", "mp3"}）
+        :param file_list: 文件列表路径（每行一个相对于 input_dir 的路径），代替目录遍历
+        :param shard: (i, N)，只处理按路径哈希划分的第 i 个分片（0 <= i < N）
+        :param resume: 使用输出目录中的检查点日志，跳过之前运行中已完成的文件
+        """
+        pipeline = None
+        if pipelined:
+            if self.streaming or workers != 1:
+                raise ValueError("Pipelined processing cannot be combined with streaming mode or worker processes")
+            from .pipeline import StagedPipeline
+            pipeline = StagedPipeline(self, decode_threads, encode_threads, queue_depth)
+
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
             self.logger.info(f"Created output directory: {output_dir}")
 
         processed_count = 0
-        failed_count = 0
+        # 记录每个失败文件及其错误信息
+        self.failed_files = []
+
+        filenames = self._list_inputs(input_dir, output_dir, recursive, extensions, file_list, shard)
+        # 文件列表中的无效条目
+        failed_count = len(self.failed_files)
 
-        for filename in os.listdir(input_dir):
+        report = RunReport(workers=workers) if report_path else None
+
+        journal = None
+        if resume:
+            from .journal import CheckpointJournal
+            journal = CheckpointJournal(_journal_path(output_dir, shard))
+
+        cache = None
+        if incremental:
+            from .cache import ProcessingCache
+            cache = ProcessingCache(output_dir, self, shard, cache_limit_mb)
+
+        # 任务: (文件名, 输入路径, 中间PCM路径, 是否复用已缓存的PCM, 直接输出路径)
+        tasks = []
+        digests = {}
+        # 分段模式的输出是清单及其引用的多个音频文件，总是直接写入输出目录（清单最后写入）
+        direct_output = direct_output or bool(self.segmentation)
+        resumed_count = 0
+        if journal is not None:
+            remaining = []
+            for filename in filenames:
+                output_filename = self._output_filename(filename)
+                if journal.is_done(filename, output_filename) and \
+                        self._output_exists(os.path.join(output_dir, output_filename)):
+                    resumed_count += 1
+                else:
+                    remaining.append(filename)
+            filenames = remaining
+        if cache is not None:
+            # 首次运行时所有输入都需要计算哈希：在线程池中并行计算，一次写入清单
+            hashes = cache.content_hashes([os.path.join(input_dir, filename) for filename in filenames])
+        for filename in filenames:
             input_path = os.path.join(input_dir, filename)
-            
-            if not os.path.isfile(input_path):
+            output_filename = self._output_filename(filename)
+            final_path = os.path.join(output_dir, output_filename)
+            output_path = None
+            if direct_output:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                output_path = final_path if self.segmentation else partial_path(final_path)
+            if cache is None:
+                tasks.append((filename, input_path, None, False, output_path))
                 continue
-                
-            # 处理音频
-            self.logger.info(f"Processing: {filename}")
-            temp_path = self.preprocess_audio(input_path)
-            
-            if temp_path:
-                # 准备输出路径
-                base, ext = os.path.splitext(filename)
-                output_filename = f"{base}_enhanced.{self.output_format}"
-                output_path = os.path.join(output_dir, output_filename)
-                
-                try:
-                    # 移动临时文件到输出目录
-                    shutil.move(temp_path, output_path)
-                    self.logger.info(f"Enhanced: {filename} -> {output_filename}")
-                    processed_count += 1
-                except Exception as e:
-                    self.logger.error(f"Failed to save {filename}: {str(e)}")
-                    failed_count += 1
-            else:
-                self.logger.warning(f"Skipped file due to processing error: {filename}")
+            digest = hashes[input_path]
+            if isinstance(digest, OSError):
+                self.logger.error(f"Failed to read {filename}: {str(digest)}")
+                self.failed_files.append((filename, str(digest)))
                 failed_count += 1
+                continue
+            if cache.is_current(digest, output_filename) and self._output_exists(final_path):
+                self.logger.debug(f"Up to date: {filename}")
+                processed_count += 1
+                continue
+            digests[filename] = digest
+            if self.segmentation:
+                # 分段需要原始的VAD结果，不能从缓存的PCM重新编码
+                tasks.append((filename, input_path, None, False, output_path))
+                continue
+            pcm_path = cache.pcm_path(digest)
+            tasks.append((filename, input_path, pcm_path, os.path.exists(pcm_path), output_path))
+
+        if journal is not None:
+            self.logger.info(f"Resuming: {resumed_count} files already completed")
+        if cache is not None:
+            self.logger.info(f"{processed_count} files up to date, {len(tasks)} to process")
+        processed_count += resumed_count
+        if report is not None:
+            report.up_to_date = processed_count
+
+        try:
+            for filename, temp_path, error, profile in self._iter_results(tasks, workers, report is not None, pipeline):
+                if temp_path:
+                    # 准备输出路径
+                    output_filename = self._output_filename(filename)
+                    output_path = os.path.join(output_dir, output_filename)
+                    
+                    try:
+                        # 把临时文件原子地放到最终位置
+                        if temp_path != output_path:
+                            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                            _place_file(temp_path, output_path)
+                        if cache is not None:
+                            cache.record(digests[filename], output_filename)
+                        if journal is not None:
+                            journal.record_done(filename, output_filename)
+                        self.logger.info(f"Enhanced: {filename} -> {output_filename}")
+                        processed_count += 1
+                        if report is not None:
+                            report.add(profile)
+                    except Exception as e:
+                        self.logger.error(f"Failed to save {filename}: {str(e)}")
+                        self.failed_files.append((filename, str(e)))
+                        failed_count += 1
+                        if journal is not None:
+                            journal.record_failed(filename, str(e))
+                else:
+                    self.logger.warning(f"Skipped file due to processing error: {filename} ({error})")
+                    self.failed_files.append((filename, error))
+                    failed_count += 1
+                    if journal is not None:
+                        journal.record_failed(filename, error)
+        finally:
+            if cache is not None:
+                removed = cache.prune()
+                if removed:
+                    self.logger.info(f"Evicted {removed} cached intermediate files")
+                cache.close()
+            if journal is not None:
+                journal.close()
+            # 清理失败任务留下的不完整输出
+            for task in tasks:
+                if task[4] and task[4].endswith(".part") and os.path.exists(task[4]):
+                    os.remove(task[4])
+
+        if report is not None:
+            for filename, error in self.failed_files:
+                report.add_failure(filename, error)
+            report.write(report_path)
+            self.logger.info(f"Run report written to {report_path}")
         
         self.logger.info(f"Processing completed: {processed_count} succeeded, {failed_count} failed")
-        return processed_count, failed_count
\ No newline at end of file
+        return processed_count, failed_count
+
+    def _list_inputs(self, input_dir, output_dir, recursive=False, extensions=None, file_list=None, shard=None):
+        """列出要处理的输入文件（相对于 input_dir 的路径）"""
+        from .discovery import discover_files, read_file_list, shard_files
+
+        if extensions:
+            extensions = {ext.strip().lower().lstrip(".") for ext in extensions}
+        if file_list:
+            filenames, invalid = read_file_list(file_list, input_dir, extensions)
+            for entry, error in invalid:
+                self.logger.error(f"Invalid file list entry {entry}: {error}")
+                self.failed_files.append((entry, error))
+        else:
+            filenames = discover_files(input_dir, recursive, extensions, exclude=[output_dir])
+        if shard is not None:
+            total = len(filenames)
+            filenames = shard_files(filenames, *shard)
+            self.logger.info(f"Shard {shard[0]}/{shard[1]}: {len(filenames)} of {total} files")
+        return filenames
+
+    def _output_filename(self, filename):
+        """输入文件名 -> 输出文件名（分段模式下为清单文件名）"""
+        base, ext = os.path.splitext(filename)
+        if self.segmentation:
+            from .segments import MANIFEST_SUFFIX
+            return f"{base}_enhanced{MANIFEST_SUFFIX}"
+        return f"{base}_enhanced.{self.output_format}"
+
+    def _output_exists(self, path):
+        """输出是否完整存在（分段模式下还要求清单引用的音频文件都存在）"""
+        if self.segmentation:
+            from .segments import is_complete
+            return is_complete(path)
+        return os.path.exists(path)
+
+    def _iter_results(self, tasks, workers, profile=False, pipeline=None):
+        """按完成顺序逐个返回 (文件名, 输出文件路径, 错误信息, 剖析记录)"""
+        if pipeline is not None:
+            yield from pipeline.run(tasks, profile)
+            return
+
+        if workers == 0:
+            workers = os.cpu_count() or 1
+
+        if workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                self.logger.info(f"Processing: {task[0]}")
+                yield (task[0],) + _process_file(self, *task[1:], profile=profile)
+            return
+
+        self.logger.info(f"Processing {len(tasks)} files with {workers} worker processes")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self._config(), self.logger.level)
+        ) as executor:
+            futures = {
+                executor.submit(_process_in_worker, task[1:], profile): task[0]
+                for task in tasks
+            }
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    temp_path, error, record = future.result()
+                except Exception as e:
+                    # 工作进程异常退出等情况
+                    temp_path, error, record = None, str(e), None
+                yield filename, temp_path, error, record
+
+
+def _dbfs(pcm):
+    """int16 样本的整体响度 (dBFS)，与 AudioSegment.dBFS 的计算方式一致"""
+    if len(pcm) == 0:
+        return -float("inf")
+    rms = int(np.sqrt(np.mean(np.square(pcm, dtype=np.float64))))
+    if rms == 0:
+        return -float("inf")
+    return 20 * log(rms / 32768, 10)
+
+
+def _place_file(source, destination):
+    """原子地把 source 放到 destination（跨文件系统时先复制为同目录下的临时文件）"""
+    try:
+        os.replace(source, destination)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    temp_path = partial_path(destination)
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.remove(source)
+
+
+def _journal_path(output_dir, shard=None):
+    """检查点日志路径（每个分片一个文件）"""
+    from .cache import CACHE_DIRNAME
+    name = "journal.jsonl" if shard is None else f"journal-{shard[0]}-of-{shard[1]}.jsonl"
+    return os.path.join(output_dir, CACHE_DIRNAME, name)
+
+
+# 工作进程内的处理器实例（每个进程独立创建）
+_worker_processor = None
+
+
+def _init_worker(config, log_level):
+    """工作进程初始化：创建独立的 AudioProcessor"""
+    global _worker_processor
+    _worker_processor = AudioProcessor(**config)
+    _worker_processor.logger.setLevel(log_level)
+
+
+def _process_in_worker(args, profile=False):
+    """在工作进程中处理单个文件"""
+    return _process_file(_worker_processor, *args, profile=profile)
+
+
+def _process_file(processor, input_path, pcm_path=None, reuse_pcm=False, output_path=None, profile=False):
+    """处理单个文件，返回 (输出文件路径, 错误信息, 剖析记录)
+
+    reuse_pcm 为真时跳过解码和DSP，直接编码缓存的中间PCM；
+    未指定 output_path 时输出到临时文件。
+    """
+    if profile:
+        processor.profiler = StageProfiler()
+    try:
+        if reuse_pcm:
+            path = processor._encode_pcm(pcm_path, output_path)
+        else:
+            path = processor._run_pipeline(input_path, pcm_path, output_path)
+        return path, None, processor.profiler.result(input_path) if profile else None
+    except CouldntDecodeError:
+        processor.logger.error(f"Audio decoding failed: {input_path}")
+        return None, "Audio decoding failed", None
+    except Exception as e:
+        processor.logger.error(f"Audio processing error: {str(e)}")
+        return None, str(e), None
+    finally:
+        processor.profiler = NULL_PROFILER
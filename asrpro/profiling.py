@@ -0,0 +1,213 @@
+"""性能剖析：记录每个文件各处理阶段的耗时和内存，并汇总为 JSON 运行报告"""
+import contextlib
+import datetime
+import json
+import os
+import sys
+import time
+import numpy as np
+from . import __version__
+
+# 预处理流程的各个阶段（报告中按此顺序列出）
+STAGES = ("decode", "noise_reduction", "vad", "enhancement", "normalization", "export")
+
+
+def current_rss_mb():
+    """当前进程的常驻内存 (MB)；无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb(children=False):
+    """当前进程（children 为真时为已结束的子进程中最大者）的峰值常驻内存 (MB)；无法获取时返回 None
+
+    Linux 上当前进程的峰值读取 VmHWM，可由 reset_peak_rss() 重置。
+    """
+    if not children:
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 2 ** 10
+        except (OSError, ValueError, IndexError):
+            pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def reset_peak_rss():
+    """把当前进程的峰值常驻内存 (VmHWM) 重置为当前值，成功时返回 True（仅 Linux）"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class StageProfiler:
+    """记录单个文件各阶段的累计耗时和阶段结束时的内存
+
+    同一阶段可多次进入（如流式处理中的每个块），耗时累加，内存取最大值。
+    峰值内存是进程级的高水位，按文件只能记录处理期间高水位的增长量。
+    """
+
+    def __init__(self, active_only=False):
+        """
+        :param active_only: 总耗时只计各阶段耗时之和，不计创建后的等待时间
+                            （流水线模式中文件会在预取和编码队列中等待）
+        """
+        self.stages = {}
+        self.memory = {}
+        self.audio_seconds = 0.0
+        self.active_only = active_only
+        self._start = time.perf_counter()
+        self._start_peak = peak_rss_mb()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            rss = current_rss_mb()
+            if rss is not None:
+                self.memory[name] = max(self.memory.get(name, 0.0), rss)
+
+    def set_audio_seconds(self, seconds):
+        """记录该文件的音频时长"""
+        self.audio_seconds = seconds
+
+    def result(self, input_path):
+        """返回该文件的剖析记录"""
+        if self.active_only:
+            total = sum(self.stages.values())
+        else:
+            total = time.perf_counter() - self._start
+        peak = peak_rss_mb()
+        return {
+            "file": input_path,
+            "pid": os.getpid(),
+            "audio_seconds": self.audio_seconds,
+            "total_seconds": total,
+            "realtime_factor": total / self.audio_seconds if self.audio_seconds else None,
+            "stages": dict(self.stages),
+            "rss_mb": dict(self.memory),
+            # 处理进程到目前为止的峰值，以及该文件处理期间峰值的增长量
+            "process_peak_rss_mb": peak,
+            "peak_rss_growth_mb": peak - self._start_peak if peak is not None else None,
+        }
+
+
+class _NullProfiler:
+    """未启用剖析时使用的空实现（全局共享，不保存任何状态）"""
+
+    def stage(self, name):
+        return contextlib.nullcontext()
+
+    def set_audio_seconds(self, seconds):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def _distribution(values):
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {}
+    return {
+        "total": float(values.sum()),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+class RunReport:
+    """汇总 process_directory 一次运行中所有文件的剖析记录"""
+
+    def __init__(self, workers=1, outliers=10):
+        self.workers = workers
+        self.outliers = outliers
+        self.records = []
+        self.failures = []
+        self.up_to_date = 0
+        self.started = datetime.datetime.now().isoformat(timespec="seconds")
+        self._start = time.perf_counter()
+
+    def add(self, record):
+        if record:
+            self.records.append(record)
+
+    def add_failure(self, filename, error):
+        self.failures.append({"file": filename, "error": error})
+
+    def to_dict(self):
+        wall = time.perf_counter() - self._start
+        audio = sum(r["audio_seconds"] for r in self.records)
+        processing = sum(r["total_seconds"] for r in self.records)
+
+        stage_names = [name for name in STAGES if any(name in r["stages"] for r in self.records)]
+        stage_names += sorted({name for r in self.records for name in r["stages"]} - set(stage_names))
+        stages = {}
+        for name in stage_names:
+            # 只统计实际执行了该阶段的文件（复用缓存的文件只有解码和导出阶段）
+            timings = [r["stages"][name] for r in self.records if name in r["stages"]]
+            stats = _distribution(timings)
+            stats["files"] = len(timings)
+            stats["share"] = stats["total"] / processing if processing else None
+            memory = [r["rss_mb"][name] for r in self.records if name in r["rss_mb"]]
+            stats["max_rss_mb"] = max(memory) if memory else None
+            stages[name] = stats
+
+        ranked = sorted(
+            (r for r in self.records if r["realtime_factor"] is not None),
+            key=lambda r: r["realtime_factor"],
+            reverse=True
+        )
+        # 每个处理进程的峰值内存（进程号 -> MB）
+        workers = {}
+        for r in self.records:
+            if r["process_peak_rss_mb"] is not None:
+                workers[r["pid"]] = max(workers.get(r["pid"], 0.0), r["process_peak_rss_mb"])
+        return {
+            "version": __version__,
+            "started": self.started,
+            "workers": self.workers,
+            "wall_seconds": wall,
+            "files": {
+                "processed": len(self.records),
+                "failed": len(self.failures),
+                "up_to_date": self.up_to_date,
+            },
+            "audio_seconds": audio,
+            "processing_seconds": processing,
+            # 处理耗时 / 音频时长（单进程）与墙钟时间 / 音频时长（整个运行）
+            "realtime_factor": processing / audio if audio else None,
+            "wall_realtime_factor": wall / audio if audio else None,
+            "file_seconds": _distribution([r["total_seconds"] for r in self.records]),
+            "file_realtime_factor": _distribution([r["realtime_factor"] for r in ranked]),
+            "stages": stages,
+            "peak_rss_mb": max(workers.values()) if workers else None,
+            "worker_peak_rss_mb": {str(pid): peak for pid, peak in sorted(workers.items())},
+            "outliers": ranked[:self.outliers],
+            "failures": self.failures,
+        }
+
+    def write(self, path):
+        """把报告写入 JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
@@ -0,0 +1,158 @@
+"""实时逐帧处理：输入 10/20/30ms 的16kHz单声道PCM帧，滤波、VAD、压缩和增益状态在帧之间延续"""
+import time
+from collections import deque
+import numpy as np
+from .filters import FilterChain, VOICE_ENHANCEMENT_SPEC, noise_reduction_spec, to_pcm_values
+from .dynamics import Compressor
+from .processor import AudioProcessor
+from .streaming import SpeechGate
+from .vad import frame_size
+
+# webrtcvad 支持的帧长 (ms)
+FRAME_DURATIONS = (10, 20, 30)
+
+
+class LatencyStats:
+    """耗时统计（默认每帧一个样本）；百分位数基于最近 window 个样本"""
+
+    def __init__(self, window=10000, unit="frames"):
+        """
+        :param unit: 样本的单位，summary() 中计数字段的名称
+        """
+        self.unit = unit
+        self.frames = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.frames += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def summary(self):
+        """返回以毫秒为单位的统计结果"""
+        if not self.frames:
+            return {self.unit: 0}
+        recent = np.asarray(self._recent) * 1000
+        return {
+            self.unit: self.frames,
+            "mean_ms": self.total / self.frames * 1000,
+            "p50_ms": float(np.percentile(recent, 50)),
+            "p99_ms": float(np.percentile(recent, 99)),
+            "max_ms": self.max * 1000,
+        }
+
+
+class RealtimeProcessor:
+    """一路实时音频流的处理器
+
+    与 AudioProcessor 的离线流程使用相同的阶段（噪声抑制、VAD软掩码、压缩、高频增强、归一化），
+    区别在于：
+    - 噪声抑制的低通截止频率无法根据整段响度选择，固定为常规音量下的 5kHz
+    - 归一化增益根据截至当前的峰值和响度计算，逐帧线性过渡，并限制最大增益
+    算法延迟为一帧：VAD 软掩码需要下一帧的判决结果才能确定帧边界处的平滑过渡，
+    其余阶段均为因果滤波，不引入额外延迟。
+    """
+    LOWPASS_CUTOFF = 5000
+    # 流开始时峰值很小，限制归一化增益避免放大底噪
+    MAX_GAIN_DB = 20.0
+
+    def __init__(self, processor=None, frame_ms=20, stats=None):
+        """
+        :param processor: 提供处理参数的 AudioProcessor（多路流可共用同一个）
+        :param frame_ms: 帧长 (10, 20, 30 ms)
+        :param stats: 记录每帧处理耗时的 LatencyStats（多路流可共用同一个）
+        """
+        if frame_ms not in FRAME_DURATIONS:
+            raise ValueError(f"Frame duration must be one of {FRAME_DURATIONS} ms, got {frame_ms}")
+        self.processor = processor or AudioProcessor()
+        self.sample_rate = self.processor.SAMPLE_RATE
+        self.frame_ms = frame_ms
+        self.frame_size = frame_size(self.sample_rate, frame_ms)
+        self.stats = stats or LatencyStats()
+        self.reset()
+
+    @property
+    def latency_ms(self):
+        """算法延迟 (ms)"""
+        return self.frame_ms
+
+    def reset(self):
+        """清除所有帧间状态，开始新的一路流"""
+        processor = self.processor
+        sample_rate = self.sample_rate
+        self._noise_filter = FilterChain(noise_reduction_spec(self.LOWPASS_CUTOFF), sample_rate)
+        # 每路流使用新的 webrtcvad 实例（SpeechGate 默认新建）
+        self._gate = SpeechGate(
+            processor, sample_rate,
+            frame_duration=self.frame_ms,
+            keep_frames=False
+        )
+        self._compressor = Compressor(sample_rate, **processor.COMPRESSOR_PARAMS)
+        self._enhancer = FilterChain(VOICE_ENHANCEMENT_SPEC, sample_rate)
+        self._pending = b""
+        self._peak = 0.0
+        self._energy = 0.0
+        self._total = 0
+        self._gain = 1.0
+
+    def process(self, data):
+        """输入任意长度的 s16le 字节，返回已处理的 s16le 字节
+
+        不足一帧的输入暂存到下次调用；每输入一帧输出一帧（第一帧除外）。
+        """
+        data = self._pending + data
+        count = len(data) // (2 * self.frame_size)
+        split = count * 2 * self.frame_size
+        self._pending = data[split:]
+        if count == 0:
+            return b""
+        frames = np.frombuffer(data[:split], dtype="<i2").reshape(count, self.frame_size)
+        return b"".join(self.process_frame(frame).tobytes() for frame in frames)
+
+    def process_frame(self, frame):
+        """处理一帧 int16 样本，返回延迟一帧的 int16 输出（第一帧返回空数组）"""
+        if len(frame) != self.frame_size:
+            raise ValueError(f"Expected {self.frame_size} samples per frame, got {len(frame)}")
+        start = time.perf_counter()
+        block = to_pcm_values(self._noise_filter.process(np.asarray(frame, dtype=np.float32)))
+        output = self._finish(self._gate.process(block))
+        self.stats.add(time.perf_counter() - start)
+        return output
+
+    def flush(self):
+        """输出所有剩余样本（不足一帧的尾部补零后参与VAD判决），并重置状态"""
+        tail = self._pending[:len(self._pending) // 2 * 2]
+        output = np.zeros(0, dtype=np.int16)
+        if tail:
+            block = np.frombuffer(tail, dtype="<i2").astype(np.float32)
+            output = self._finish(self._gate.process(to_pcm_values(self._noise_filter.process(block))))
+        output = np.concatenate([output, self._finish(self._gate.flush())])
+        self.reset()
+        return output.tobytes()
+
+    def _finish(self, block):
+        """压缩、高频增强和归一化"""
+        if len(block) == 0:
+            return np.zeros(0, dtype=np.int16)
+        block = to_pcm_values(block)
+        block = to_pcm_values(self._enhancer.process(self._compressor.process(block)))
+        return self._normalize(block)
+
+    def _normalize(self, block):
+        values = block.astype(np.float64)
+        self._peak = max(self._peak, float(np.abs(values).max()))
+        self._energy += float(np.dot(values, values))
+        self._total += len(values)
+        if self._energy == 0:
+            dbfs = -float("inf")
+        else:
+            dbfs = 20 * np.log10(np.sqrt(self._energy / self._total) / 32768)
+        gain = min(self.processor._perceptual_gain(self._peak, dbfs), self.MAX_GAIN_DB)
+        target = 10 ** (gain / 20)
+        # 在一帧内从上一帧的增益线性过渡到新增益，避免增益跳变产生咔嗒声
+        ramp = np.linspace(self._gain, target, len(block) + 1, dtype=np.float32)[1:]
+        self._gain = target
+        return to_pcm_values(block * ramp).astype(np.int16)
@@ -0,0 +1,183 @@
+"""语音分段导出：根据帧级VAD结果只输出语音区域，并生成记录原始时间位置的清单"""
+import json
+import os
+import tempfile
+from collections import namedtuple
+import numpy as np
+from .encoder import PCMEncoder, partial_path
+
+# 清单文件后缀（输出文件名为 <名称>.segments.json）
+MANIFEST_SUFFIX = ".segments.json"
+# 编码时每次写入 ffmpeg 的样本数
+_BLOCK_SIZE = 160000
+
+
+class Segmentation(namedtuple("Segmentation", ["mode", "padding_ms", "min_speech_ms", "max_gap_ms"])):
+    """分段参数
+
+    :param mode: "clips" 每个语音段输出一个文件；"concat" 把所有语音段拼接为一个文件
+    :param padding_ms: 每个语音段前后保留的时长
+    :param min_speech_ms: 短于该时长的语音段（合并后）被丢弃
+    :param max_gap_ms: 间隔不超过该时长的相邻语音段合并为一段
+    """
+    __slots__ = ()
+    MODES = ("clips", "concat")
+
+    def __new__(cls, mode="clips", padding_ms=200, min_speech_ms=250, max_gap_ms=300):
+        if mode not in cls.MODES:
+            raise ValueError(f"Segmentation mode must be one of {cls.MODES}, got {mode!r}")
+        return super().__new__(cls, mode, padding_ms, min_speech_ms, max_gap_ms)
+
+
+# 语音段的样本范围 [start, end)
+Segment = namedtuple("Segment", ["start", "end"])
+
+
+def speech_segments(vad_result, padding_ms=200, min_speech_ms=250, max_gap_ms=300):
+    """把帧级VAD结果转换为语音段列表（按样本计，已加上前后余量并合并重叠部分）"""
+    frames = np.asarray(vad_result.frames, dtype=bool)
+    if not frames.any():
+        return []
+    duration = vad_result.frame_duration
+    size = vad_result.frame_size
+
+    # 连续语音帧 [开始帧, 结束帧)
+    edges = np.diff(np.concatenate([[0], frames.astype(np.int8), [0]]))
+    runs = []
+    for start, end in zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]):
+        if runs and (start - runs[-1][1]) * duration <= max_gap_ms:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+
+    pad = int(vad_result.sample_rate * padding_ms / 1000)
+    segments = []
+    for start, end in runs:
+        if (end - start) * duration < min_speech_ms:
+            continue
+        start = max(int(start) * size - pad, 0)
+        end = min(int(end) * size + pad, vad_result.num_samples)
+        if segments and start <= segments[-1].end:
+            segments[-1] = Segment(segments[-1].start, max(end, segments[-1].end))
+        elif end > start:
+            segments.append(Segment(start, end))
+    return segments
+
+
+def export_segments(samples, vad_result, segmentation, output_format, sample_rate=16000,
+                    manifest_path=None, source=None, gain=0.0):
+    """导出语音段和清单，返回清单文件路径
+
+    :param samples: 处理后的16kHz单声道 int16 样本（支持 len() 和切片的对象，如按需读取文件的 _PCMFile）
+    :param manifest_path: 清单路径（<名称>.segments.json），音频文件写在同一目录下；
+                          为 None 时写入新建的临时目录
+    :param gain: 编码前施加的增益 (dB)
+    """
+    if manifest_path is None:
+        manifest_path = os.path.join(tempfile.mkdtemp(prefix="asrpro-segments-"), "segments" + MANIFEST_SUFFIX)
+    directory = os.path.dirname(manifest_path)
+    name = os.path.basename(manifest_path)
+    if name.endswith(MANIFEST_SUFFIX):
+        name = name[:-len(MANIFEST_SUFFIX)]
+
+    segments = speech_segments(
+        vad_result, segmentation.padding_ms, segmentation.min_speech_ms, segmentation.max_gap_ms
+    )
+    # 之前运行生成的音频文件（新清单不再引用的需要删除）
+    previous = manifest_files(manifest_path) or []
+    entries = []
+    written = []
+    try:
+        if segmentation.mode == "concat":
+            filename = f"{name}.{output_format}" if segments else None
+            offset = 0
+            for index, segment in enumerate(segments):
+                length = segment.end - segment.start
+                entries.append(_entry(index, segment, sample_rate, offset=offset / sample_rate))
+                offset += length
+            if segments:
+                written.append(_encode_ranges(
+                    samples, segments, os.path.join(directory, filename), output_format, sample_rate, gain
+                ))
+        else:
+            filename = None
+            for index, segment in enumerate(segments):
+                clip = f"{name}_{index + 1:04d}.{output_format}"
+                written.append(_encode_ranges(
+                    samples, [segment], os.path.join(directory, clip), output_format, sample_rate, gain
+                ))
+                entries.append(_entry(index, segment, sample_rate, file=clip))
+    except BaseException:
+        for path in written:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    manifest = {
+        "source": source,
+        "mode": segmentation.mode,
+        "sample_rate": sample_rate,
+        "file": filename,
+        "duration": len(samples) / sample_rate,
+        "speech_duration": sum(s.end - s.start for s in segments) / sample_rate,
+        "padding_ms": segmentation.padding_ms,
+        "min_speech_ms": segmentation.min_speech_ms,
+        "max_gap_ms": segmentation.max_gap_ms,
+        "segments": entries,
+    }
+    # 先删除旧清单中不再使用的音频文件：即使在此之后中断，旧清单引用的文件不全，也会被重新处理
+    for path in set(previous) - set(written):
+        if os.path.exists(path):
+            os.remove(path)
+
+    # 清单最后写入：清单存在即表示所有音频文件都已完整生成
+    manifest_partial = partial_path(manifest_path)
+    with open(manifest_partial, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(manifest_partial, manifest_path)
+    return manifest_path
+
+
+def manifest_files(manifest_path):
+    """清单引用的音频文件路径；清单不存在或无法解析时返回 None"""
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        names = [manifest["file"]] if manifest.get("file") else []
+        names += [entry["file"] for entry in manifest["segments"] if entry.get("file")]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    directory = os.path.dirname(manifest_path)
+    # 只接受同一目录下的文件名
+    return [os.path.join(directory, name) for name in names if name == os.path.basename(name)]
+
+
+def is_complete(manifest_path):
+    """清单及其引用的所有音频文件是否都存在"""
+    files = manifest_files(manifest_path)
+    return files is not None and all(os.path.exists(path) for path in files)
+
+
+def _entry(index, segment, sample_rate, **extra):
+    """清单中的一个语音段：原始音频中的起止时间（秒），以及在输出中的位置"""
+    entry = {
+        "index": index,
+        "start": segment.start / sample_rate,
+        "end": segment.end / sample_rate,
+    }
+    entry.update(extra)
+    return entry
+
+
+def _encode_ranges(samples, segments, output_path, output_format, sample_rate, gain):
+    """把若干样本范围依次送入同一个 ffmpeg 编码进程，返回输出文件路径
+
+    先写入同目录下的临时文件，编码完成后再重命名：中断时不会留下截断的音频文件。
+    """
+    temp_path = partial_path(output_path)
+    with PCMEncoder(temp_path, output_format, sample_rate, gain) as encoder:
+        for segment in segments:
+            for start in range(segment.start, segment.end, _BLOCK_SIZE):
+                encoder.write(np.asarray(samples[start:min(start + _BLOCK_SIZE, segment.end)]))
+    os.replace(temp_path, output_path)
+    return output_path
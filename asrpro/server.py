@@ -0,0 +1,244 @@
+"""asyncio 实时处理服务
+
+每个连接是一路独立的音频流：客户端发送16kHz单声道 s16le PCM，服务端按帧处理后以相同格式返回，
+输出比输入延迟一帧；客户端关闭写方向后，服务端输出剩余样本并关闭连接。
+事件循环只负责网络读写，DSP 在工作进程中执行；每路流固定由一个工作进程处理，帧间状态保存在该进程中。
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .processor import AudioProcessor
+from .realtime import LatencyStats, RealtimeProcessor
+
+# 每次从连接读取的最大字节数
+READ_SIZE = 1 << 16
+
+
+class StreamServer:
+    """在本地 TCP 或 Unix 套接字上同时处理多路实时音频流"""
+
+    def __init__(self, frame_ms=20, aggressiveness=3, max_streams=256, stats_interval=60, workers=1):
+        """
+        :param frame_ms: 帧长 (10, 20, 30 ms)，决定算法延迟
+        :param max_streams: 最大并发流数，超出时直接关闭新连接
+        :param stats_interval: 定期输出延迟和容量统计的间隔（秒），0 为不输出
+        :param workers: 执行DSP的工作进程数 (0为使用全部CPU核心)
+        """
+        self.aggressiveness = aggressiveness
+        self.frame_ms = frame_ms
+        self.max_streams = max_streams
+        self.stats_interval = stats_interval
+        self.workers = workers or os.cpu_count() or 1
+        # 工作进程中每帧的DSP耗时
+        self.frame_stats = LatencyStats()
+        # 从收到一次读取的数据到写回其输出的耗时（一次读取可能包含多帧）
+        self.read_stats = LatencyStats(unit="reads")
+        self.output_frames = 0
+        self.logger = logging.getLogger("ChildSpeechProcessor")
+        self.active_streams = 0
+        self.peak_streams = 0
+        self.total_streams = 0
+        self.rejected_streams = 0
+        # 每个工作进程一个单进程执行器，同一路流的请求按顺序在同一进程中执行
+        self._executors = []
+        self._worker_streams = [0] * self.workers
+        self._next_stream_id = 0
+        # 提前检查帧长
+        self.frame_size = RealtimeProcessor(AudioProcessor(aggressiveness=aggressiveness), frame_ms).frame_size
+
+    def start_workers(self):
+        """创建工作进程执行器"""
+        if not self._executors:
+            self._executors = [
+                ProcessPoolExecutor(
+                    max_workers=1,
+                    initializer=_init_worker,
+                    initargs=(self.aggressiveness, self.frame_ms, self.logger.level)
+                )
+                for _ in range(self.workers)
+            ]
+
+    def close_workers(self):
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
+
+    async def handle(self, reader, writer):
+        """处理一个连接（一路流）"""
+        if self.active_streams >= self.max_streams:
+            self.rejected_streams += 1
+            self.logger.warning(f"Rejected stream: {self.max_streams} streams already active")
+            writer.close()
+            return
+
+        self.active_streams += 1
+        self.total_streams += 1
+        self.peak_streams = max(self.peak_streams, self.active_streams)
+        # 新的流分配给当前流数最少的工作进程
+        worker = min(range(self.workers), key=self._worker_streams.__getitem__)
+        self._worker_streams[worker] += 1
+        executor = self._executors[worker]
+        stream_id = self._next_stream_id
+        self._next_stream_id += 1
+        loop = asyncio.get_running_loop()
+        finished = False
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                received = time.perf_counter()
+                output, timings = await loop.run_in_executor(executor, _process_chunk, stream_id, data)
+                for seconds in timings:
+                    self.frame_stats.add(seconds)
+                if output:
+                    writer.write(output)
+                    self.read_stats.add(time.perf_counter() - received)
+                    self.output_frames += len(output) // (2 * self.frame_size)
+                    await writer.drain()
+            finished = True
+            writer.write(await loop.run_in_executor(executor, _finish_stream, stream_id))
+            await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+        except ConnectionError as e:
+            self.logger.debug(f"Stream closed by client: {e}")
+        finally:
+            if not finished:
+                # 释放工作进程中该流的状态（排在该流之前的请求之后执行）
+                executor.submit(_finish_stream, stream_id)
+            self._worker_streams[worker] -= 1
+            self.active_streams -= 1
+            writer.close()
+
+    def summary(self):
+        """延迟和容量统计"""
+        per_frame_ms = None
+        capacity = None
+        if self.output_frames and self.read_stats.total:
+            # 每帧的实时预算为一个帧长；按端到端耗时（含进程间通信和排队）估计，负载较高时偏保守
+            per_frame_ms = self.read_stats.total * 1000 / self.output_frames
+            capacity = int(self.workers * self.frame_ms / per_frame_ms)
+        return {
+            "frame_ms": self.frame_ms,
+            "workers": self.workers,
+            "algorithmic_latency_ms": self.frame_ms,
+            "active_streams": self.active_streams,
+            "peak_streams": self.peak_streams,
+            "total_streams": self.total_streams,
+            "rejected_streams": self.rejected_streams,
+            "frame_processing": self.frame_stats.summary(),
+            "read_latency": self.read_stats.summary(),
+            "end_to_end_ms_per_frame": per_frame_ms,
+            "estimated_capacity_streams": capacity,
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        frames = summary["frame_processing"]
+        reads = summary["read_latency"]
+        if frames["frames"] and reads["reads"]:
+            timing = (
+                f"per-frame processing mean {frames['mean_ms']:.3f} ms, p50 {frames['p50_ms']:.3f} ms, "
+                f"p99 {frames['p99_ms']:.3f} ms, max {frames['max_ms']:.3f} ms over {frames['frames']} frames; "
+                f"receive-to-send p50 {reads['p50_ms']:.3f} ms, p99 {reads['p99_ms']:.3f} ms "
+                f"over {reads['reads']} reads ({summary['end_to_end_ms_per_frame']:.3f} ms per frame); "
+                f"estimated capacity {summary['estimated_capacity_streams']} concurrent streams "
+                f"on {summary['workers']} workers"
+            )
+        else:
+            timing = "no frames processed yet"
+        self.logger.info(
+            f"Streams: {summary['active_streams']} active, {summary['peak_streams']} peak, "
+            f"{summary['total_streams']} total, {summary['rejected_streams']} rejected; "
+            f"latency {summary['algorithmic_latency_ms']} ms + {timing}"
+        )
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            self.log_summary()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_path=None):
+        """启动服务并一直运行"""
+        self.start_workers()
+        # 提前启动工作进程，第一路流不必等待进程启动
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, int) for executor in self._executors))
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+            address = unix_path
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            address = f"{host}:{port}"
+        self.logger.info(
+            f"Serving 16kHz mono s16le streams on {address} "
+            f"({self.frame_ms} ms frames, up to {self.max_streams} streams, {self.workers} workers)"
+        )
+        reporter = asyncio.ensure_future(self._report()) if self.stats_interval else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            self.log_summary()
+            self.close_workers()
+            if unix_path and os.path.exists(unix_path):
+                os.remove(unix_path)
+
+
+def run_server(host="127.0.0.1", port=8765, unix_path=None, **kwargs):
+    """运行服务直到被中断，返回 StreamServer 以便读取统计结果"""
+    server = StreamServer(**kwargs)
+    try:
+        asyncio.run(server.serve(host, port, unix_path))
+    except KeyboardInterrupt:
+        pass
+    return server
+
+
+# 工作进程内的处理器和各路流的状态（每个进程独立创建）
+_worker_processor = None
+_worker_frame_ms = None
+_worker_streams = {}
+
+
+class _FrameTimings:
+    """工作进程中收集每帧的处理耗时，随输出一起返回主进程（代替 LatencyStats）"""
+
+    def __init__(self):
+        self._pending = []
+
+    def add(self, seconds):
+        self._pending.append(seconds)
+
+    def take(self):
+        pending, self._pending = self._pending, []
+        return pending
+
+
+def _init_worker(aggressiveness, frame_ms, log_level):
+    """工作进程初始化：创建独立的 AudioProcessor"""
+    global _worker_processor, _worker_frame_ms
+    _worker_processor = AudioProcessor(aggressiveness=aggressiveness)
+    _worker_processor.logger.setLevel(log_level)
+    _worker_frame_ms = frame_ms
+
+
+def _process_chunk(stream_id, data):
+    """在工作进程中处理一路流收到的数据，返回 (已处理的 s16le 字节, 每帧处理耗时列表)"""
+    stream = _worker_streams.get(stream_id)
+    if stream is None:
+        stream = _worker_streams[stream_id] = RealtimeProcessor(
+            _worker_processor, _worker_frame_ms, stats=_FrameTimings()
+        )
+    return stream.process(data), stream.stats.take()
+
+
+def _finish_stream(stream_id):
+    """输出一路流的剩余样本并释放其状态"""
+    stream = _worker_streams.pop(stream_id, None)
+    return stream.flush() if stream is not None else b""
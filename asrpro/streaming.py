@@ -0,0 +1,311 @@
+"""分块流式处理：解码、滤波、VAD、压缩和编码均按固定大小的块进行，峰值内存与文件长度无关"""
+import contextlib
+import os
+import tempfile
+import logging
+import numpy as np
+from .filters import FilterChain, VOICE_ENHANCEMENT_SPEC, noise_reduction_spec, to_pcm_values
+from .dynamics import Compressor
+from .decoder import iter_decoded_blocks, wav_pcm_range
+from .encoder import PCMEncoder, partial_path
+from .vad import VADResult, detect_speech_frames, frame_size, speech_gain_envelope
+
+
+class SpeechGate:
+    """逐块应用VAD软掩码；最后一帧暂缓输出，待下一帧判决后再确定边界处的平滑过渡"""
+
+    def __init__(self, processor, sample_rate, vad=None, frame_duration=None, keep_frames=True):
+        """
+        :param vad: 使用的 webrtcvad 实例（默认新建一个，每个文件或每路流一个）
+        :param frame_duration: VAD帧长 (ms)，默认为 processor.VAD_FRAME_MS
+        :param keep_frames: 是否保留所有帧的判决结果（供 result() 使用）
+        """
+        self.processor = processor
+        self.vad = vad or processor._new_vad()
+        self.sample_rate = sample_rate
+        self.frame_duration = frame_duration or processor.VAD_FRAME_MS
+        self.frame_size = frame_size(sample_rate, self.frame_duration)
+        self.keep_frames = keep_frames
+        self.window = processor._smoothing_window()
+        self.reset()
+
+    def reset(self):
+        """清除块间状态"""
+        self._pending = np.zeros(0, dtype=np.float32)   # 尚未凑满一帧的样本
+        self._held = np.zeros(0, dtype=np.float32)      # 暂缓输出的最后一帧
+        self._held_gain = None
+        self._prev_gain = None
+        self._frames = []
+
+    def process(self, samples):
+        """输入任意长度的一块样本，返回可以确定输出的样本（延迟不超过一帧）"""
+        samples = np.concatenate([self._pending, samples])
+        n_frames = len(samples) // self.frame_size
+        self._pending = samples[n_frames * self.frame_size:]
+        samples = samples[:n_frames * self.frame_size]
+        if n_frames == 0:
+            return samples
+        return self._emit(samples, self._detect(samples), final=False)
+
+    def flush(self):
+        """输出剩余样本（不足一帧的尾部补零后参与判决）"""
+        tail = self._pending
+        self._pending = np.zeros(0, dtype=np.float32)
+        gains = self._detect(tail) if len(tail) else np.zeros(0, dtype=np.float32)
+        return self._emit(tail, gains, final=True)
+
+    def result(self, num_samples):
+        """整个文件的帧级VAD结果"""
+        frames = np.concatenate(self._frames) if self._frames else np.zeros(0, dtype=bool)
+        return VADResult(frames, self.frame_duration, self.sample_rate, num_samples)
+
+    def _detect(self, samples):
+        frames = detect_speech_frames(self.vad, samples.astype(np.int16), self.sample_rate, self.frame_duration)
+        if self.keep_frames:
+            self._frames.append(frames)
+        return self.processor._frame_gains(frames)
+
+    def _emit(self, samples, gains, final):
+        if self._held_gain is not None:
+            samples = np.concatenate([self._held, samples])
+            gains = np.concatenate([[self._held_gain], gains]).astype(np.float32)
+        if len(gains) == 0:
+            return samples
+
+        envelope = speech_gain_envelope(gains, self.frame_size, self.window, prev_gain=self._prev_gain)
+        count = len(samples) if final else len(samples) - self.frame_size
+        output = samples[:count] * envelope[:count]
+
+        self._held = samples[count:]
+        self._held_gain = None if final else gains[-1]
+        if len(gains) > 1:
+            self._prev_gain = gains[-2]
+        return output
+
+
+class _PCMFile:
+    """文件中的一段 int16 样本，按需读取
+
+    不使用内存映射：映射文件中被访问过的页面计入常驻内存，峰值内存会随文件长度增长。
+    支持 len() 和步长为1的切片，可代替样本数组传给 export_segments。
+    """
+
+    def __init__(self, path, offset=0, count=None):
+        self.path = path
+        self.offset = offset
+        self.count = (os.path.getsize(path) - offset) // 2 if count is None else count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start, stop, step = index.indices(self.count)
+        if step != 1:
+            raise ValueError("Only contiguous slices are supported")
+        if stop <= start:
+            return np.zeros(0, dtype=np.int16)
+        with open(self.path, "rb") as f:
+            f.seek(self.offset + 2 * start)
+            return np.fromfile(f, dtype="<i2", count=stop - start)
+
+    def blocks(self, block_size):
+        """依次读取每块 block_size 个样本（最后一块可能更短）"""
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            remaining = self.count
+            while remaining > 0:
+                block = np.fromfile(f, dtype="<i2", count=min(block_size, remaining))
+                if len(block) == 0:
+                    break
+                remaining -= len(block)
+                yield block
+
+
+class StreamingPipeline:
+    """以固定大小的块执行 AudioProcessor 的预处理流程
+
+    1. 解码：ffmpeg 直接输出16kHz单声道PCM，逐块写入临时文件并统计响度
+       （16kHz单声道WAV直接从输入文件分块读取，跳过 ffmpeg）
+    2. 处理：逐块执行噪声抑制、VAD、压缩和高频增强，滤波/压缩/平滑状态在块之间延续
+    3. 编码：根据第2步统计的峰值和响度计算归一化增益，逐块送入 ffmpeg 编码
+
+    峰值内存只取决于块长度；中间结果以16位PCM形式暂存在临时目录中。
+    """
+
+    def __init__(self, processor, block_seconds=10):
+        self.processor = processor
+        self.sample_rate = processor.SAMPLE_RATE
+        self.logger = logging.getLogger("ChildSpeechProcessor")
+        size = frame_size(self.sample_rate, processor.VAD_FRAME_MS)
+        # 块长度对齐到VAD帧
+        self.block_size = max(int(block_seconds * self.sample_rate) // size, 1) * size
+
+    def process_file(self, input_path, pcm_path=None, output_path=None):
+        """处理单个文件，返回输出文件路径
+
+        :param pcm_path: 若指定，同时保存编码前的16位PCM
+        :param output_path: 若指定，直接写入该路径，否则写入临时文件
+        """
+        profiler = self.processor.profiler
+        with profiler.stage("decode"):
+            samples, dbfs, raw_path = self._decode(input_path)
+        profiler.set_audio_seconds(len(samples) / self.sample_rate)
+        try:
+            processed_path, peak, processed_dbfs, vad_result = self._process(samples, dbfs)
+        finally:
+            if raw_path:
+                os.remove(raw_path)
+        try:
+            with profiler.stage("normalization"):
+                gain = self.processor._perceptual_gain(peak, processed_dbfs)
+            with profiler.stage("export"):
+                if self.processor.segmentation:
+                    return self._export_segments(processed_path, gain, vad_result, input_path, output_path)
+                return self._encode(processed_path, gain, pcm_path, output_path)
+        finally:
+            os.remove(processed_path)
+
+    def encode_pcm(self, pcm_path, output_path=None):
+        """逐块编码已处理好的16位PCM文件，返回输出文件路径"""
+        profiler = self.processor.profiler
+        profiler.set_audio_seconds(os.path.getsize(pcm_path) / 2 / self.sample_rate)
+        with profiler.stage("export"):
+            return self._encode(pcm_path, 0.0, output_path=output_path)
+
+    def _decode(self, input_path):
+        """解码为16kHz单声道PCM，返回 (_PCMFile, dBFS, 临时文件路径)
+
+        输入已是16kHz单声道16位WAV时直接读取输入文件的数据块（不产生临时文件），
+        否则把 ffmpeg 的输出逐块写入临时文件；之后的处理都按块读取。
+        """
+        pcm_range = wav_pcm_range(input_path, self.sample_rate)
+        if pcm_range is not None:
+            samples = _PCMFile(input_path, *pcm_range)
+            energy = 0.0
+            for block in samples.blocks(self.block_size):
+                block = block.astype(np.float64)
+                energy += float(np.dot(block, block))
+            return samples, self._dbfs(energy, len(samples)), None
+
+        temp_fd, raw_path = tempfile.mkstemp(suffix=".pcm")
+        total = 0
+        energy = 0.0
+        try:
+            with os.fdopen(temp_fd, "wb") as raw_file:
+                for block in iter_decoded_blocks(input_path, self.sample_rate, self.block_size):
+                    raw_file.write(block.tobytes())
+                    block = block.astype(np.float64)
+                    total += len(block)
+                    energy += float(np.dot(block, block))
+            samples = _PCMFile(raw_path, 0, total)
+        except BaseException:
+            os.remove(raw_path)
+            raise
+
+        self.logger.debug(f"Decoded {total / self.sample_rate:.1f}s of audio in blocks of {self.block_size} samples")
+        return samples, self._dbfs(energy, total), raw_path
+
+    def _process(self, samples, dbfs):
+        """逐块执行DSP阶段，返回 (处理后PCM临时文件路径, 峰值, dBFS, VADResult)"""
+        processor = self.processor
+        sample_rate = self.sample_rate
+        lowpass_cutoff = 6000 if dbfs < -35 else 5000
+        gate = SpeechGate(processor, sample_rate)
+        stages = (
+            FilterChain(noise_reduction_spec(lowpass_cutoff), sample_rate),
+            gate,
+            Compressor(sample_rate, **processor.COMPRESSOR_PARAMS),
+            FilterChain(VOICE_ENHANCEMENT_SPEC, sample_rate),
+        )
+
+        temp_fd, processed_path = tempfile.mkstemp(suffix=".pcm")
+        stats = {"peak": 0, "energy": 0.0, "total": 0}
+        try:
+            with os.fdopen(temp_fd, "wb") as dst:
+                for block in samples.blocks(self.block_size):
+                    self._write_block(dst, self._run_stages(stages, block.astype(np.float32)), stats)
+                self._write_block(dst, self._run_stages(stages, None), stats)
+        except BaseException:
+            os.remove(processed_path)
+            raise
+
+        return processed_path, stats["peak"], self._dbfs(stats["energy"], stats["total"]), gate.result(stats["total"])
+
+    def _run_stages(self, stages, block):
+        """对一块样本执行所有阶段；block 为 None 时冲刷VAD平滑的剩余样本"""
+        noise_filter, gate, compressor, enhancer = stages
+        profiler = self.processor.profiler
+        if block is None:
+            with profiler.stage("vad"):
+                block = to_pcm_values(gate.flush())
+        else:
+            with profiler.stage("noise_reduction"):
+                block = to_pcm_values(noise_filter.process(block))
+            with profiler.stage("vad"):
+                block = to_pcm_values(gate.process(block))
+        with profiler.stage("enhancement"):
+            return to_pcm_values(enhancer.process(compressor.process(block))).astype(np.int16)
+
+    def _write_block(self, dst, pcm, stats):
+        if len(pcm) == 0:
+            return
+        dst.write(pcm.tobytes())
+        values = pcm.astype(np.float64)
+        stats["peak"] = max(stats["peak"], int(np.abs(values).max()))
+        stats["energy"] += float(np.dot(values, values))
+        stats["total"] += len(values)
+
+    def _encode(self, processed_path, gain, pcm_path=None, output_path=None):
+        """应用归一化增益并逐块编码为输出格式，返回输出文件路径
+
+        :param pcm_path: 若指定，同时把送入编码器的PCM写入该文件
+        :param output_path: 若指定，直接写入该路径，否则写入临时文件
+        """
+        output_format = self.processor.output_format
+        if output_path is None:
+            temp_fd, temp_path = tempfile.mkstemp(suffix=f".{output_format}")
+            os.close(temp_fd)
+        else:
+            temp_path = output_path
+
+        copy_path = partial_path(pcm_path) if pcm_path else None
+        try:
+            with PCMEncoder(temp_path, output_format, self.sample_rate, gain) as encoder, \
+                    open(processed_path, "rb") as src, _open_optional(copy_path) as copy:
+                while True:
+                    pcm = np.fromfile(src, dtype=np.int16, count=self.block_size)
+                    if len(pcm) == 0:
+                        break
+                    data = encoder.write(pcm)
+                    if copy is not None:
+                        copy.write(data)
+        except BaseException:
+            # 不完整的输出文件已由 PCMEncoder 删除
+            _remove_files(copy_path)
+            raise
+        if copy_path:
+            os.replace(copy_path, pcm_path)
+        return temp_path
+
+    def _export_segments(self, processed_path, gain, vad_result, input_path, manifest_path=None):
+        """从处理后的PCM临时文件中只编码语音段"""
+        return self.processor._export_segments(
+            _PCMFile(processed_path), vad_result, input_path, manifest_path, gain=gain
+        )
+
+    def _dbfs(self, energy, total):
+        """与 pydub 的 AudioSegment.dBFS 相同的响度计算"""
+        if total == 0 or energy == 0:
+            return -float("inf")
+        return 20 * np.log10(np.sqrt(energy / total) / 32768)
+
+
+def _open_optional(path):
+    """path 为 None 时返回一个产生 None 的上下文管理器"""
+    return open(path, "wb") if path else contextlib.nullcontext()
+
+
+def _remove_files(*paths):
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,86 @@
+"""帧级VAD：在一个连续的 int16 缓冲区上批量判决，并以帧分辨率生成增益包络"""
+from collections import namedtuple
+import numpy as np
+
+
+class VADResult(namedtuple("VADResult", ["frames", "frame_duration", "sample_rate", "num_samples"])):
+    """帧级VAD结果
+
+    :param frames: 每帧是否为语音 (bool 数组)，最后一帧可能是补零后的不完整帧
+    :param frame_duration: 帧长 (ms)
+    :param sample_rate: 采样率
+    :param num_samples: 对应的样本数
+    """
+    __slots__ = ()
+
+    @property
+    def frame_size(self):
+        return frame_size(self.sample_rate, self.frame_duration)
+
+    @property
+    def speech_ratio(self):
+        """语音帧所占比例"""
+        return float(np.mean(self.frames)) if len(self.frames) else 0.0
+
+
+def frame_size(sample_rate, frame_duration):
+    """每帧样本数"""
+    return int(sample_rate * frame_duration / 1000)
+
+
+def detect_speech_frames(vad, pcm, sample_rate, frame_duration):
+    """对 int16 样本逐帧调用 webrtcvad，返回 bool 数组
+
+    所有帧共享同一个连续缓冲区（通过 memoryview 切片，不逐帧复制），
+    不足一帧的尾部补零后同样参与判决。
+    """
+    size = frame_size(sample_rate, frame_duration)
+    n_frames = -(-len(pcm) // size)
+    if n_frames == 0:
+        return np.zeros(0, dtype=bool)
+
+    buffer = np.zeros(n_frames * size, dtype=np.int16)
+    buffer[:len(pcm)] = pcm
+    view = memoryview(buffer).cast("B")
+    step = size * 2
+    is_speech = vad.is_speech
+    return np.fromiter(
+        (is_speech(view[offset:offset + step], sample_rate) for offset in range(0, len(view), step)),
+        dtype=bool,
+        count=n_frames
+    )
+
+
+def speech_gain_envelope(gains, frame_size, window, prev_gain=None, next_gain=None):
+    """把帧级增益上采样为样本级 float32 包络
+
+    结果等价于对逐样本增益序列做归一化窗口平滑（np.convolve 'same'），
+    但只在增益变化的帧边界处写入平滑过渡，其余位置直接按帧重复。
+    prev_gain/next_gain 为前后相邻帧的增益（用于分块处理时的边界过渡）。
+    """
+    gains = np.asarray(gains, dtype=np.float32)
+    envelope = np.repeat(gains, frame_size)
+    total = len(envelope)
+
+    before = len(window) // 2
+    ramp = (np.cumsum(window) / np.sum(window)).astype(np.float32)
+    offsets = np.arange(len(window)) - (len(window) - 1 - before)
+
+    # 增益变化的帧边界（包括与相邻块之间的边界）
+    padded = np.concatenate([
+        [gains[0] if prev_gain is None else prev_gain],
+        gains,
+        [gains[-1] if next_gain is None else next_gain],
+    ]).astype(np.float32)
+    changes = np.nonzero(padded[1:] != padded[:-1])[0]
+    if len(changes) == 0:
+        return envelope
+
+    boundaries = changes * frame_size
+    start_gain = padded[changes][:, np.newaxis]
+    end_gain = padded[changes + 1][:, np.newaxis]
+    positions = boundaries[:, np.newaxis] + offsets
+    values = start_gain + (end_gain - start_gain) * ramp
+    inside = (positions >= 0) & (positions < total)
+    envelope[positions[inside]] = values[inside]
+    return envelope
@@ -0,0 +1,9 @@
+"""asrpro 性能基准：确定性合成夹具 + 计时/内存测量 + 基线对比
+
+用法（在仓库根目录下）：
+    python -m benchmarks.run                       # 运行快速套件并打印结果
+    python -m benchmarks.run --save-baseline       # 保存为基线
+    python -m benchmarks.run --compare             # 与基线对比，出现回退时返回非零
+    python -m benchmarks.run --suite full          # 包含 10 分钟和 1 小时的长音频
+    python -m benchmarks.run -k startup            # 只检查启动耗时（超出 --startup-budget 时返回非零）
+"""
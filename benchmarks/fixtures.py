@@ -0,0 +1,119 @@
+"""确定性合成夹具：模拟儿童语音（高基频浊音段）、静音和 3/4kHz 啸叫
+
+信号按块生成，每块使用由 (种子, 块序号) 决定的随机数，
+因此相同参数在任何机器上都生成逐字节相同的文件，且一小时的夹具也不需要整体放入内存。
+"""
+import os
+import wave
+from collections import namedtuple
+import numpy as np
+
+# 生成时每块的时长（秒）
+BLOCK_SECONDS = 10
+
+
+class Fixture(namedtuple("Fixture", ["name", "seconds", "sample_rate", "channels", "hum", "seed"])):
+    """一个合成音频夹具的参数"""
+    __slots__ = ()
+
+    @property
+    def filename(self):
+        # 包含所有参数（包括种子），不同的夹具不会互相覆盖
+        return f"{self.name}-{self.sample_rate}hz-{self.channels}ch-{self.seconds}s-seed{self.seed}.wav"
+
+
+# 快速套件：几秒到一分钟，覆盖常见采样率和声道数
+QUICK_FIXTURES = (
+    Fixture("speech", 5, 16000, 1, False, 1),
+    Fixture("speech", 30, 16000, 1, False, 2),
+    Fixture("speech_hum", 30, 44100, 2, True, 3),
+    Fixture("speech", 60, 48000, 2, False, 4),
+    Fixture("speech_hum", 60, 8000, 1, True, 5),
+    Fixture("silence", 30, 16000, 1, False, 6),
+)
+
+# 完整套件：额外包含长音频
+FULL_FIXTURES = QUICK_FIXTURES + (
+    Fixture("speech_hum", 600, 48000, 2, True, 7),
+    Fixture("speech", 3600, 16000, 1, False, 8),
+)
+
+
+def _voiced_segments(rng, seconds):
+    """在 [0, seconds) 内随机安排浊音段，返回 (开始, 结束, 基频) 列表"""
+    segments = []
+    t = rng.uniform(0.1, 0.5)
+    while t < seconds:
+        length = rng.uniform(0.3, 1.5)
+        segments.append((t, min(t + length, seconds), rng.uniform(250.0, 450.0)))
+        t += length + rng.uniform(0.2, 1.0)
+    return segments
+
+
+def _child_voice(rng, count, rate, f0):
+    """高基频浊音：带轻微颤音的谐波叠加，谐波幅度按频率衰减并在共振峰附近抬升"""
+    t = np.arange(count) / rate
+    vibrato = 1.0 + 0.02 * np.sin(2 * np.pi * rng.uniform(4.0, 6.0) * t)
+    phase = 2 * np.pi * f0 * np.cumsum(vibrato) / rate
+    formants = (rng.uniform(900, 1200), rng.uniform(2200, 3200))
+    signal = np.zeros(count)
+    for k in range(1, int(min(7000, rate / 2) // f0) + 1):
+        freq = k * f0
+        gain = 1.0 / k + sum(0.6 * np.exp(-((freq - f) / 400.0) ** 2) for f in formants)
+        signal += gain * np.sin(k * phase)
+    # 整段的升余弦起落
+    envelope = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(count) / count)
+    return signal * envelope / (np.max(np.abs(signal)) + 1e-9)
+
+
+def _render_block(fixture, index, block_size):
+    """生成第 index 块的单声道 float64 信号，幅度范围 [-1, 1]"""
+    rate = fixture.sample_rate
+    start = index * block_size
+    count = min(block_size, fixture.seconds * rate - start)
+    rng = np.random.RandomState((fixture.seed * 100003 + index) % 2 ** 32)
+    t = (start + np.arange(count)) / rate
+
+    # 底噪
+    signal = rng.normal(0.0, 0.002, count)
+    if fixture.name != "silence":
+        block_seconds = count / rate
+        for begin, end, f0 in _voiced_segments(rng, block_seconds):
+            lo, hi = int(begin * rate), int(end * rate)
+            if hi - lo > 1:
+                signal[lo:hi] += rng.uniform(0.2, 0.5) * _child_voice(rng, hi - lo, rate, f0)
+    if fixture.hum:
+        # 电子设备的 3kHz / 4kHz 啸叫（低于奈奎斯特频率时才加入）
+        for freq in (3000.0, 4000.0):
+            if freq < rate / 2:
+                signal += 0.01 * np.sin(2 * np.pi * freq * t)
+    return np.clip(signal, -1.0, 1.0)
+
+
+def write_fixture(fixture, path):
+    """把夹具写为16位 WAV 文件"""
+    block_size = BLOCK_SECONDS * fixture.sample_rate
+    total = fixture.seconds * fixture.sample_rate
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with wave.open(tmp_path, "wb") as f:
+        f.setnchannels(fixture.channels)
+        f.setsampwidth(2)
+        f.setframerate(fixture.sample_rate)
+        for index in range(-(-total // block_size)):
+            mono = _render_block(fixture, index, block_size)
+            frames = np.repeat(mono[:, np.newaxis], fixture.channels, axis=1)
+            if fixture.channels > 1:
+                # 右声道略微衰减，避免完全相同的声道
+                frames[:, 1:] *= 0.8
+            f.writeframes(np.round(frames * 32767).astype("<i2").tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def ensure_fixture(fixture, directory):
+    """返回夹具文件路径，不存在时生成"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, fixture.filename)
+    if not os.path.exists(path):
+        write_fixture(fixture, path)
+    return path
@@ -0,0 +1,364 @@
+"""基准测试运行器
+
+每个用例在独立的子进程中运行（峰值内存互不影响），记录最短耗时、
+吞吐量（音频秒数 / 处理秒数）、实时率（处理秒数 / 音频秒数）和峰值常驻内存。
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from .fixtures import FULL_FIXTURES, QUICK_FIXTURES, Fixture, ensure_fixture
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+DEFAULT_FIXTURE_DIR = os.path.join(tempfile.gettempdir(), "asrpro-bench-fixtures")
+
+# 单阶段基准使用的夹具（解码后为16kHz单声道）
+STAGE_FIXTURE = Fixture("speech_hum", 30, 44100, 2, True, 3)
+# process_directory 基准使用的一组短文件
+DIRECTORY_FIXTURES = tuple(
+    Fixture("speech_hum" if i % 2 else "speech", 15, rate, i % 2 + 1, bool(i % 2), 100 + i)
+    for i, rate in enumerate((16000, 44100, 48000, 22050, 16000, 48000, 8000, 32000))
+)
+STAGES = ("decode", "noise_reduction", "vad", "enhancement", "normalization", "export")
+
+# 启动耗时用例：(用例名, python 参数, 是否受启动预算约束)
+STARTUP_CASES = (
+    ("startup/version", ["-m", "asrpro", "--version"], True),
+    ("startup/help", ["-m", "asrpro", "--help"], True),
+    ("startup/import", ["-c", "import asrpro"], True),
+    ("startup/import_processor", ["-c", "from asrpro import AudioProcessor"], False),
+)
+# 不导入重量级依赖的启动路径的耗时上限（秒，含解释器启动）
+STARTUP_BUDGET = 0.25
+
+# 默认回退阈值：耗时增加 15%、峰值内存增加 20%
+TIME_THRESHOLD = 0.15
+MEMORY_THRESHOLD = 0.20
+
+
+def _prepare_stage_input(processor, path, stage):
+    """运行 stage 之前的所有阶段，返回 stage 的输入"""
+    from pydub import AudioSegment
+    from asrpro.decoder import decode_file
+
+    if stage == "decode":
+        return path
+    pcm = decode_file(path, processor.SAMPLE_RATE)
+    audio = AudioSegment(pcm.tobytes(), frame_rate=processor.SAMPLE_RATE, sample_width=2, channels=1)
+    steps = (
+        ("noise_reduction", processor._child_specific_noise_reduction),
+        ("vad", processor._enhanced_child_vad),
+        ("enhancement", processor._child_voice_enhancement),
+        ("normalization", processor._perceptual_normalization),
+    )
+    for name, step in steps:
+        if name == stage:
+            break
+        audio = step(audio)
+    return audio
+
+
+def _run_stage(processor, stage, data):
+    from asrpro.decoder import decode_file
+
+    if stage == "decode":
+        return decode_file(data, processor.SAMPLE_RATE)
+    if stage == "export":
+        path = processor._export_processed_audio(data)
+        os.remove(path)
+        return None
+    return {
+        "noise_reduction": processor._child_specific_noise_reduction,
+        "vad": processor._enhanced_child_vad,
+        "enhancement": processor._child_voice_enhancement,
+        "normalization": processor._perceptual_normalization,
+    }[stage](data)
+
+
+class _RSSSampler:
+    """无法重置峰值内存时，在后台线程中定期采样常驻内存，记录最大值"""
+
+    def __init__(self, interval=0.005):
+        from asrpro.profiling import current_rss_mb
+
+        self._current = current_rss_mb
+        self.peak = current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            rss = self._current()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.peak
+
+
+def _measure(kind, params, repeat):
+    """在子进程中运行一个用例，返回测量结果
+
+    峰值内存只包括用例本身：单阶段用例先运行之前的所有阶段准备输入，
+    准备完成后重置进程的峰值内存（不支持时改为在运行期间采样）。
+    """
+    logging.getLogger("ChildSpeechProcessor").setLevel(logging.ERROR)
+    from asrpro.processor import AudioProcessor
+    from asrpro.profiling import current_rss_mb, peak_rss_mb, reset_peak_rss
+
+    processor = AudioProcessor(output_format=params.get("format", "wav"), streaming=params.get("streaming", False))
+    if kind == "preprocess":
+        def run():
+            os.remove(processor.preprocess_audio(params["path"]))
+    elif kind == "stage":
+        data = _prepare_stage_input(processor, params["path"], params["stage"])
+
+        def run():
+            _run_stage(processor, params["stage"], data)
+    elif kind == "directory":
+        output_dir = tempfile.mkdtemp(prefix="asrpro-bench-out-")
+
+        def run():
+            processed, failed = processor.process_directory(
+                params["path"], output_dir, workers=params["workers"], pipelined=params.get("pipelined", False)
+            )
+            if failed:
+                raise RuntimeError(f"{failed} files failed")
+    else:
+        raise ValueError(f"Unknown benchmark kind: {kind}")
+
+    rss_before = current_rss_mb()
+    sampler = None if reset_peak_rss() else _RSSSampler()
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    finally:
+        peak = sampler.stop() if sampler is not None else peak_rss_mb()
+        if kind == "directory":
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return {
+        "seconds": min(timings),
+        "timings": timings,
+        "peak_rss_mb": peak,
+        "rss_delta_mb": peak - rss_before if peak is not None and rss_before is not None else None,
+    }
+
+
+def _measure_startup(params, repeat):
+    """在新的解释器中运行 asrpro 的启动路径，返回测量结果"""
+    from asrpro.profiling import peak_rss_mb
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable] + params["args"],
+            cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        timings.append(time.perf_counter() - start)
+    return {"seconds": min(timings), "timings": timings, "peak_rss_mb": peak_rss_mb(children=True)}
+
+
+def _cases(suite, fixture_dir, pattern=None):
+    """生成 (用例名, 类型, 参数, 音频秒数) 列表
+
+    只保留名称包含 pattern 的用例，并且只生成这些用例用到的夹具。
+    """
+    fixtures = FULL_FIXTURES if suite == "full" else QUICK_FIXTURES
+    # (用例名, 类型, 参数, 音频秒数, 需要的夹具 [(夹具, 目录)])
+    cases = [(name, "startup", {"args": args, "budget": budget}, None, []) for name, args, budget in STARTUP_CASES]
+    for fixture in fixtures:
+        path = os.path.join(fixture_dir, fixture.filename)
+        name = os.path.splitext(fixture.filename)[0]
+        # 长音频在内存模式下占用过大，只测流式模式
+        if fixture.seconds <= 600:
+            cases.append((f"preprocess/{name}", "preprocess", {"path": path}, fixture.seconds,
+                          [(fixture, fixture_dir)]))
+        if fixture.seconds >= 60:
+            cases.append((f"preprocess_streaming/{name}", "preprocess", {"path": path, "streaming": True},
+                          fixture.seconds, [(fixture, fixture_dir)]))
+
+    path = os.path.join(fixture_dir, STAGE_FIXTURE.filename)
+    for stage in STAGES:
+        cases.append((f"stage/{stage}", "stage", {"path": path, "stage": stage}, STAGE_FIXTURE.seconds,
+                      [(STAGE_FIXTURE, fixture_dir)]))
+
+    directory = os.path.join(fixture_dir, "directory")
+    needed = [(fixture, directory) for fixture in DIRECTORY_FIXTURES]
+    audio_seconds = sum(f.seconds for f in DIRECTORY_FIXTURES)
+    # 目录处理使用命令行默认的 MP3 输出
+    for workers in (1, 0):
+        cases.append((f"process_directory/workers={workers}", "directory",
+                      {"path": directory, "workers": workers, "format": "mp3"}, audio_seconds, needed))
+    cases.append(("process_directory/pipelined", "directory",
+                  {"path": directory, "workers": 1, "pipelined": True, "format": "mp3"}, audio_seconds, needed))
+
+    selected = []
+    for name, kind, params, seconds, needed in cases:
+        if pattern and pattern not in name:
+            continue
+        for fixture, directory in needed:
+            ensure_fixture(fixture, directory)
+        selected.append((name, kind, params, seconds))
+    return selected
+
+
+def _environment():
+    import numpy
+    import scipy
+    from asrpro import __version__
+
+    try:
+        from importlib.metadata import version
+        pydub_version = version("pydub")
+    except Exception:
+        pydub_version = None
+    return {
+        "asrpro": __version__,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "scipy": scipy.__version__,
+        "pydub": pydub_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(suite="quick", fixture_dir=DEFAULT_FIXTURE_DIR, repeat=3, pattern=None,
+                   startup_budget=STARTUP_BUDGET):
+    """运行基准测试，返回结果字典"""
+    results = {}
+    context = get_context("spawn")
+    for name, kind, params, audio_seconds in _cases(suite, fixture_dir, pattern):
+        # 每个用例使用新进程，峰值内存只反映该用例
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            if kind == "startup":
+                result = executor.submit(_measure_startup, params, repeat).result()
+            else:
+                result = executor.submit(_measure, kind, params, repeat).result()
+        if kind == "startup":
+            result["budget_seconds"] = startup_budget if params["budget"] else None
+            results[name] = result
+            over = " OVER BUDGET" if result["budget_seconds"] and result["seconds"] > startup_budget else ""
+            print(f"{name:<58} {result['seconds']:9.3f}s  {'':>17}  {result['peak_rss_mb']:8.1f} MB{over}", flush=True)
+            continue
+        result["audio_seconds"] = audio_seconds
+        result["throughput"] = audio_seconds / result["seconds"] if result["seconds"] else None
+        result["realtime_factor"] = result["seconds"] / audio_seconds
+        results[name] = result
+        print(f"{name:<58} {result['seconds']:9.3f}s  {result['throughput']:8.1f}x realtime  "
+              f"{result['peak_rss_mb']:8.1f} MB", flush=True)
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "suite": suite,
+        "repeat": repeat,
+        "environment": _environment(),
+        "results": results,
+    }
+
+
+def compare(report, baseline, time_threshold=TIME_THRESHOLD, memory_threshold=MEMORY_THRESHOLD):
+    """与基线对比，返回回退列表 [(用例名, 指标, 基线值, 当前值, 变化比例)]"""
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<58} (not in baseline)")
+            continue
+        line = [f"{name:<58}"]
+        for metric, threshold in (("seconds", time_threshold), ("peak_rss_mb", memory_threshold)):
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1.0
+            flag = ""
+            if change > threshold:
+                flag = " REGRESSION"
+                regressions.append((name, metric, old, new, change))
+            line.append(f"{metric} {old:9.3f} -> {new:9.3f} ({change:+6.1%}){flag}")
+        print("  ".join(line))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="asrpro benchmark suite on deterministic synthetic child-speech fixtures",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--suite", choices=["quick", "full"], default="quick",
+                        help="quick: fixtures up to one minute; full: adds 10 minute and 1 hour fixtures")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (the fastest run is reported)")
+    parser.add_argument("-k", "--filter", dest="pattern", help="Only run cases whose name contains this string")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR, help="Directory for generated fixtures")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results to the baseline file")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline and flag regressions")
+    parser.add_argument("--time-threshold", type=float, default=TIME_THRESHOLD,
+                        help="Relative slowdown that counts as a regression")
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD,
+                        help="Relative peak RSS increase that counts as a regression")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET,
+                        help="Seconds allowed for 'asrpro --version', '--help' and 'import asrpro'")
+    parser.add_argument("-o", "--output", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            parser.error(f"Baseline not found: {args.baseline} (create it with --save-baseline)")
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = run_benchmarks(args.suite, args.fixtures, args.repeat, args.pattern, args.startup_budget)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+
+    status = 0
+    over_budget = [
+        name for name, result in report["results"].items()
+        if result.get("budget_seconds") and result["seconds"] > result["budget_seconds"]
+    ]
+    if over_budget:
+        print(f"\nStartup budget of {args.startup_budget:.3f}s exceeded: {', '.join(over_budget)}")
+        status = 1
+
+    if baseline is not None:
+        if baseline.get("environment") != report["environment"]:
+            print("Warning: baseline was recorded in a different environment")
+        print()
+        regressions = compare(report, baseline, args.time_threshold, args.memory_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) found")
+            return 1
+        print("\nNo regressions")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
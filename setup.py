@@ -7,6 +7,8 @@ setup(
     install_requires=[
         "pydub>=0.25.1",
         "ffmpeg-python>=0.2.0",
+        "numpy",
+        "scipy",
     ],
     entry_points={
         "console_scripts": [
@@ -24,6 +26,6 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     include_package_data=True,
 )
\ No newline at end of file
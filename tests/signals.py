@@ -0,0 +1,28 @@
+"""测试用的小型确定性合成信号"""
+import wave
+import numpy as np
+
+
+def child_speech(seconds=2.0, sample_rate=16000, seed=0, level=0.3):
+    """高基频浊音段与静音交替的 int16 信号，叠加底噪和 3kHz 啸叫"""
+    rng = np.random.RandomState(seed)
+    count = int(seconds * sample_rate)
+    t = np.arange(count) / sample_rate
+    signal = rng.normal(0.0, 0.003, count)
+    voiced = np.sin(2 * np.pi * 1.5 * t) > 0
+    f0 = 300.0 + 40.0 * np.sin(2 * np.pi * 5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    for k in range(1, 12):
+        signal += voiced * (level / k) * np.sin(k * phase)
+    signal += 0.01 * np.sin(2 * np.pi * 3000.0 * t)
+    return np.clip(np.rint(signal * 32767), -32768, 32767).astype(np.int16)
+
+
+def write_wav(path, samples, sample_rate=16000):
+    """把单声道 int16 样本写为 WAV 文件"""
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(np.asarray(samples, dtype="<i2").tobytes())
+    return str(path)
@@ -0,0 +1,165 @@
+import os
+import pytest
+from asrpro import processor as processor_module
+from asrpro.cache import CACHE_DIRNAME, ProcessingCache
+from asrpro.processor import AudioProcessor
+from .signals import child_speech, write_wav
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("unexpected decode and DSP run")
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for seed in (11, 12):
+        write_wav(input_dir / f"clip{seed}.wav", child_speech(seconds=1.0, seed=seed))
+    return str(input_dir), str(tmp_path / "output")
+
+
+def _outputs(output_dir):
+    return {
+        name: os.stat(os.path.join(output_dir, name)).st_mtime_ns
+        for name in os.listdir(output_dir) if not name.startswith(".")
+    }
+
+
+def test_rerun_skips_unchanged_files(dirs, monkeypatch):
+    input_dir, output_dir = dirs
+    assert AudioProcessor().process_directory(input_dir, output_dir, incremental=True) == (2, 0)
+    before = _outputs(output_dir)
+
+    monkeypatch.setattr(AudioProcessor, "_run_pipeline", _fail)
+    monkeypatch.setattr(AudioProcessor, "_encode_pcm", _fail)
+    assert AudioProcessor().process_directory(input_dir, output_dir, incremental=True) == (2, 0)
+    assert _outputs(output_dir) == before
+
+
+def test_changed_input_is_reprocessed(dirs):
+    input_dir, output_dir = dirs
+    AudioProcessor().process_directory(input_dir, output_dir, incremental=True)
+    before = _outputs(output_dir)
+
+    write_wav(os.path.join(input_dir, "clip11.wav"), child_speech(seconds=1.0, seed=13))
+    assert AudioProcessor().process_directory(input_dir, output_dir, incremental=True) == (2, 0)
+    after = _outputs(output_dir)
+    assert after["clip11_enhanced.wav"] != before["clip11_enhanced.wav"]
+    assert after["clip12_enhanced.wav"] == before["clip12_enhanced.wav"]
+
+
+def test_modified_output_is_regenerated(dirs):
+    input_dir, output_dir = dirs
+    AudioProcessor().process_directory(input_dir, output_dir, incremental=True)
+    output_path = os.path.join(output_dir, "clip12_enhanced.wav")
+    size = os.path.getsize(output_path)
+    with open(output_path, "ab") as f:
+        f.write(b"\0\0")
+
+    assert AudioProcessor().process_directory(input_dir, output_dir, incremental=True) == (2, 0)
+    assert os.path.getsize(output_path) == size
+
+
+def test_new_output_format_reuses_cached_pcm(dirs, monkeypatch):
+    input_dir, output_dir = dirs
+    AudioProcessor().process_directory(input_dir, output_dir, incremental=True)
+
+    monkeypatch.setattr(AudioProcessor, "_run_pipeline", _fail)
+    processor = AudioProcessor(output_format="flac")
+    assert processor.process_directory(input_dir, output_dir, incremental=True) == (2, 0)
+    assert os.path.exists(os.path.join(output_dir, "clip11_enhanced.flac"))
+
+
+def _count_runs(monkeypatch):
+    calls = []
+    run_pipeline = AudioProcessor._run_pipeline
+
+    def counting(self, *args):
+        calls.append(args)
+        return run_pipeline(self, *args)
+
+    monkeypatch.setattr(AudioProcessor, "_run_pipeline", counting)
+    return calls
+
+
+@pytest.mark.parametrize("first, second", [
+    ({}, {"aggressiveness": 1}),
+    ({}, {"streaming": True}),
+    ({"streaming": True}, {"streaming": True, "block_seconds": 1}),
+])
+def test_parameter_change_is_a_miss(dirs, monkeypatch, first, second):
+    input_dir, output_dir = dirs
+    AudioProcessor(**first).process_directory(input_dir, output_dir, incremental=True)
+
+    calls = _count_runs(monkeypatch)
+    assert AudioProcessor(**second).process_directory(input_dir, output_dir, incremental=True) == (2, 0)
+    assert len(calls) == 2
+
+
+def test_dsp_version_change_is_a_miss(dirs, monkeypatch):
+    input_dir, output_dir = dirs
+    AudioProcessor().process_directory(input_dir, output_dir, incremental=True)
+
+    calls = _count_runs(monkeypatch)
+    monkeypatch.setattr(processor_module, "DSP_VERSION", processor_module.DSP_VERSION + 1)
+    assert AudioProcessor().process_directory(input_dir, output_dir, incremental=True) == (2, 0)
+    assert len(calls) == 2
+
+
+def _cached_pcm(output_dir):
+    return sorted(os.listdir(os.path.join(output_dir, CACHE_DIRNAME, "pcm")))
+
+
+def test_unused_pcm_is_evicted_over_limit(dirs):
+    input_dir, output_dir = dirs
+    AudioProcessor().process_directory(input_dir, output_dir, incremental=True)
+    assert len(_cached_pcm(output_dir)) == 2
+
+    # 不超过上限时保留旧的中间结果
+    write_wav(os.path.join(input_dir, "clip11.wav"), child_speech(seconds=1.0, seed=13))
+    AudioProcessor().process_directory(input_dir, output_dir, incremental=True)
+    assert len(_cached_pcm(output_dir)) == 3
+
+    # 超出上限时只保留本次运行用到的中间结果
+    write_wav(os.path.join(input_dir, "clip12.wav"), child_speech(seconds=1.0, seed=14))
+    AudioProcessor().process_directory(input_dir, output_dir, incremental=True, cache_limit_mb=0)
+    cache = ProcessingCache(output_dir, AudioProcessor())
+    try:
+        expected = [os.path.basename(cache.pcm_path(cache.content_hash(os.path.join(input_dir, "clip12.wav"))))]
+    finally:
+        cache.close()
+    assert _cached_pcm(output_dir) == expected
+
+
+def test_shards_use_separate_manifests_without_wal(tmp_path):
+    processor = AudioProcessor()
+    for shard in ((0, 2), (1, 2)):
+        cache = ProcessingCache(str(tmp_path), processor, shard=shard)
+        try:
+            assert cache.db.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        finally:
+            cache.close()
+    names = sorted(os.listdir(tmp_path / CACHE_DIRNAME))
+    assert names == ["manifest-0-of-2.sqlite", "manifest-1-of-2.sqlite", "pcm"]
+
+
+def test_content_hashes_are_batched_and_reused(tmp_path, monkeypatch):
+    from asrpro import cache as cache_module
+
+    paths = [write_wav(tmp_path / f"{seed}.wav", child_speech(seconds=0.5, seed=seed)) for seed in range(20, 25)]
+    missing = str(tmp_path / "missing.wav")
+    cache = ProcessingCache(str(tmp_path / "output"), AudioProcessor())
+    statements = []
+    cache.db.set_trace_callback(statements.append)
+    try:
+        hashes = cache.content_hashes(paths + [missing])
+        assert isinstance(hashes[missing], OSError)
+        assert hashes[paths[0]] == cache_module.file_digest(paths[0])
+        assert len({hashes[path] for path in paths}) == len(paths)
+        assert sum(statement.strip().upper() == "COMMIT" for statement in statements) == 1
+
+        monkeypatch.setattr(cache_module, "file_digest", _fail)
+        assert cache.content_hashes(paths) == {path: hashes[path] for path in paths}
+    finally:
+        cache.close()
@@ -0,0 +1,19 @@
+import logging
+import pytest
+from asrpro.cli import main
+
+
+def test_batch_cli_logs_to_processor_logger(tmp_path, caplog):
+    logger = logging.getLogger("ChildSpeechProcessor")
+    handlers, level = list(logger.handlers), logger.level
+    try:
+        caplog.set_level(logging.DEBUG)
+        with pytest.raises(SystemExit):
+            main([str(tmp_path / "missing"), str(tmp_path / "output"), "-v"])
+        assert logger.level == logging.DEBUG
+    finally:
+        logger.handlers[:] = handlers
+        logger.setLevel(level)
+    messages = [record.getMessage() for record in caplog.records if record.name == "ChildSpeechProcessor"]
+    assert "Verbose mode enabled" in messages
+    assert any(message.startswith("Input directory does not exist") for message in messages)
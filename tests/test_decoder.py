@@ -0,0 +1,37 @@
+import threading
+import ffmpeg
+import numpy as np
+from asrpro.decoder import iter_decoded_blocks
+
+
+def _corrupt_mp3(path):
+    """生成一个每隔几十字节就被破坏的 MP3（ffmpeg 解码时输出大量错误信息）"""
+    (
+        ffmpeg
+        .input("anoisesrc=d=240:a=0.3:seed=1", format="lavfi")
+        .output(str(path), ac=1, ar=16000, audio_bitrate="32k")
+        .global_args("-nostdin", "-loglevel", "error")
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    data = bytearray(path.read_bytes())
+    data[1000::41] = np.random.RandomState(0).randint(0, 256, len(data[1000::41]), dtype=np.uint8).tobytes()
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+def test_block_decoding_does_not_hang_on_large_error_output(tmp_path):
+    path = _corrupt_mp3(tmp_path / "corrupt.mp3")
+    result = []
+
+    def decode():
+        try:
+            result.append(sum(len(block) for block in iter_decoded_blocks(path)))
+        except Exception as e:
+            result.append(e)
+
+    thread = threading.Thread(target=decode, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive(), "decoder blocked on a full stderr pipe"
+    assert result
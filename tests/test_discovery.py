@@ -0,0 +1,40 @@
+import os
+from asrpro.discovery import discover_files, read_file_list, shard_files
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def test_file_list_and_discovery_agree_on_symlinks(tmp_path):
+    input_dir = tmp_path / "input"
+    _touch(str(input_dir / "sub" / "a.wav"))
+    _touch(str(tmp_path / "outside.wav"))
+    os.symlink(input_dir / "sub" / "a.wav", input_dir / "link.wav")
+    os.symlink(tmp_path / "outside.wav", input_dir / "escape.wav")
+
+    discovered = discover_files(str(input_dir), recursive=True)
+    assert discovered == ["escape.wav", "link.wav", "sub/a.wav"]
+
+    list_path = tmp_path / "files.txt"
+    list_path.write_text("\n".join(discovered + ["../outside.wav", str(tmp_path / "outside.wav")]) + "\n")
+    files, invalid = read_file_list(str(list_path), str(input_dir))
+    assert files == discovered
+    assert [entry for entry, _ in invalid] == ["../outside.wav", str(tmp_path / "outside.wav")]
+
+
+def test_discovery_skips_hidden_files(tmp_path):
+    for name in ("a.wav", "._a.wav", ".hidden/b.wav", "sub/c.wav", "sub/._c.wav"):
+        _touch(str(tmp_path / name))
+    assert discover_files(str(tmp_path)) == ["a.wav"]
+    assert discover_files(str(tmp_path), recursive=True) == ["a.wav", "sub/c.wav"]
+
+
+def test_shards_partition_files():
+    files = [f"speaker{i % 7}/utt{i:03d}.wav" for i in range(200)]
+    shards = [shard_files(files, index, 4) for index in range(4)]
+    assert sorted(sum(shards, [])) == sorted(files)
+    assert all(shard for shard in shards)
+    # 分片只取决于路径，与列表顺序无关
+    assert shard_files(files[::-1], 1, 4) == shards[1][::-1]
@@ -0,0 +1,28 @@
+import numpy as np
+from asrpro.dynamics import Compressor
+from .signals import child_speech
+
+SAMPLE_RATE = 16000
+PARAMS = {"threshold": -45.0, "ratio": 3.0, "attack": 10.0, "release": 200.0}
+
+
+def test_block_processing_matches_whole_signal():
+    samples = child_speech(seed=4).astype(np.float32)
+    whole = Compressor(SAMPLE_RATE, **PARAMS).process(samples)
+    compressor = Compressor(SAMPLE_RATE, **PARAMS)
+    # 块边界不与 1ms 控制周期对齐
+    blocks = np.concatenate([compressor.process(block) for block in np.array_split(samples, 13)])
+    np.testing.assert_array_equal(blocks, whole)
+
+
+def test_attenuates_above_threshold_only():
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    tone = np.sin(2 * np.pi * 440.0 * t).astype(np.float32)
+    quiet = Compressor(SAMPLE_RATE, **PARAMS).process(tone * 100)
+    loud = Compressor(SAMPLE_RATE, **PARAMS).process(tone * 10000)
+    # -50 dBFS 左右的信号低于阈值，保持不变
+    np.testing.assert_allclose(quiet, tone * 100, rtol=1e-5, atol=1e-3)
+    # 稳态信号超出阈值的部分按 3:1 压缩
+    over_db = 20 * np.log10(10000 / np.sqrt(2) / 32768) - PARAMS["threshold"]
+    steady = np.abs(loud[SAMPLE_RATE // 2:]).max() / 10000
+    assert abs(20 * np.log10(steady) + over_db * (1 - 1 / PARAMS["ratio"])) < 0.5
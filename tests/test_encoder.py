@@ -0,0 +1,29 @@
+import os
+import numpy as np
+import pytest
+from pydub.exceptions import CouldntEncodeError
+from asrpro.decoder import decode_file
+from asrpro.encoder import PCMEncoder, encode_pcm_data
+from .signals import child_speech
+
+
+def test_blocks_and_gain_round_trip(tmp_path):
+    samples = child_speech(seconds=1.0, seed=60)
+    path = str(tmp_path / "out.wav")
+    with PCMEncoder(path, "wav", gain=-6.0) as encoder:
+        for start in range(0, len(samples), 4000):
+            encoder.write(samples[start:start + 4000])
+    expected = np.clip(np.rint(samples.astype(np.float32) * np.float32(10 ** (-6.0 / 20))), -32768, 32767)
+    np.testing.assert_array_equal(decode_file(path), expected.astype(np.int16))
+
+
+def test_failed_encoding_removes_output(tmp_path):
+    path = str(tmp_path / "out.flac")
+    with pytest.raises(RuntimeError):
+        with PCMEncoder(path, "flac") as encoder:
+            encoder.write(child_speech(seconds=0.5, seed=61))
+            raise RuntimeError("interrupted")
+    assert not os.path.exists(path)
+
+    with pytest.raises(CouldntEncodeError):
+        encode_pcm_data(b"\0" * 3200, str(tmp_path / "missing" / "out.flac"), "flac")
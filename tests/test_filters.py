@@ -0,0 +1,53 @@
+import numpy as np
+from pydub import AudioSegment
+from asrpro.filters import FilterChain, VOICE_ENHANCEMENT_SPEC, noise_reduction_spec
+from .signals import child_speech
+
+SAMPLE_RATE = 16000
+# 与 pydub 逐样本取整的滤波链相比允许的最大误差 (int16 LSB)
+TOLERANCE = 4
+
+
+def _segment(samples):
+    return AudioSegment(samples.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=1)
+
+
+def _samples(audio):
+    return np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.int32)
+
+
+def _run_chain(spec, samples):
+    output = FilterChain(spec, SAMPLE_RATE).process(samples.astype(np.float32))
+    return np.rint(output).astype(np.int32)
+
+
+def test_noise_reduction_matches_pydub():
+    samples = child_speech(seed=1)
+    expected = _samples(_segment(samples).high_pass_filter(150).low_pass_filter(5000))
+    actual = _run_chain(noise_reduction_spec(5000, notch_freqs=()), samples)
+    assert np.abs(actual - expected).max() <= TOLERANCE
+
+
+def test_voice_enhancement_matches_pydub():
+    samples = child_speech(seed=2)
+    audio = _segment(samples)
+    expected = _samples(audio.overlay(audio.high_pass_filter(1500).apply_gain(6)).low_pass_filter(6500))
+    actual = _run_chain(VOICE_ENHANCEMENT_SPEC, samples)
+    assert np.abs(actual - expected).max() <= TOLERANCE
+
+
+def test_notch_removes_hum():
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    hum = (3000 * np.sin(2 * np.pi * 3000.0 * t)).astype(np.float32)
+    output = FilterChain((("notch", 3000.0, 10.0),), SAMPLE_RATE).process(hum)
+    # 跳过起始的瞬态
+    assert np.abs(output[SAMPLE_RATE // 2:]).max() < 0.05 * 3000
+
+
+def test_block_processing_matches_whole_signal():
+    samples = child_speech(seed=3).astype(np.float32)
+    spec = noise_reduction_spec(5000)
+    whole = FilterChain(spec, SAMPLE_RATE).process(samples)
+    chain = FilterChain(spec, SAMPLE_RATE)
+    blocks = np.concatenate([chain.process(block) for block in np.array_split(samples, 7)])
+    np.testing.assert_allclose(blocks, whole, atol=1e-2)
@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from asrpro.processor import AudioProcessor
+from .signals import child_speech, write_wav
+
+
+@pytest.fixture(scope="module")
+def expected():
+    samples = child_speech(seconds=1.5, seed=60)
+    return samples, AudioProcessor().process_array(samples, 16000)
+
+
+def test_integer_and_float_inputs_use_full_scale(expected):
+    samples, result = expected
+    assert result.samples.dtype == np.int16 and len(result.samples) == len(samples)
+    assert result.vad.num_samples == len(samples)
+    processor = AudioProcessor()
+    for scaled in (samples.astype(np.int32) << 16, samples.astype(np.float32) / 32768):
+        assert np.array_equal(processor.process_array(scaled, 16000).samples, result.samples)
+
+    as_float = processor.process_array(samples, 16000, dtype=np.float32).samples
+    assert as_float.dtype == np.float32
+    assert np.array_equal(as_float, result.samples.astype(np.float32) / 32768)
+
+
+def test_stereo_is_mixed_and_other_rates_are_resampled(expected):
+    samples, result = expected
+    processor = AudioProcessor()
+    stereo = np.stack([samples, samples], axis=1)
+    assert np.array_equal(processor.process_array(stereo, 16000).samples, result.samples)
+
+    resampled = processor.process_array(np.repeat(samples, 3), 48000)
+    assert resampled.sample_rate == 16000
+    assert len(resampled.samples) == len(samples)
+    assert resampled.vad.num_samples == len(samples)
+
+
+def test_invalid_input_is_rejected():
+    processor = AudioProcessor()
+    with pytest.raises(ValueError):
+        processor.process_array(np.zeros((2, 2, 2), dtype=np.int16), 16000)
+    with pytest.raises(ValueError):
+        processor.process_array(np.zeros(16000, dtype=np.uint8), 16000)
+
+
+def test_process_bytes_accepts_raw_pcm_and_encoded_audio(expected, tmp_path):
+    samples, result = expected
+    processor = AudioProcessor()
+    raw = processor.process_bytes(samples.astype("<i2").tobytes(), sample_rate=16000)
+    assert np.array_equal(raw.samples, result.samples)
+
+    interleaved = np.stack([samples, samples], axis=1).astype("<i2").tobytes()
+    stereo = processor.process_bytes(interleaved, sample_rate=16000, channels=2)
+    assert np.array_equal(stereo.samples, result.samples)
+
+    with open(write_wav(tmp_path / "input.wav", samples), "rb") as f:
+        encoded = processor.process_bytes(f.read())
+    assert np.array_equal(encoded.samples, result.samples)
+
+
+def test_threads_sharing_a_processor_get_their_own_vad_results():
+    processor = AudioProcessor()
+    inputs = [child_speech(seconds=0.5 + 0.1 * i, seed=61 + i) for i in range(8)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda samples: processor.process_array(samples, 16000), inputs * 3))
+    for samples, result in zip(inputs * 3, results):
+        assert result.vad.num_samples == len(samples) == len(result.samples)
+
+
+def test_direct_output_matches_temporary_files(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for seed in (62, 63):
+        write_wav(input_dir / f"{seed}.wav", child_speech(seconds=1.0, seed=seed))
+    outputs = {}
+    for direct_output in (False, True):
+        output_dir = tmp_path / f"output-{direct_output}"
+        processor = AudioProcessor()
+        assert processor.process_directory(str(input_dir), str(output_dir), direct_output=direct_output) == (2, 0)
+        outputs[direct_output] = {name: (output_dir / name).read_bytes() for name in os.listdir(output_dir)}
+    assert sorted(outputs[True]) == ["62_enhanced.wav", "63_enhanced.wav"]
+    assert outputs[True] == outputs[False]
+
+
+def test_direct_output_failure_leaves_no_partial_file(tmp_path, monkeypatch):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    write_wav(input_dir / "a.wav", child_speech(seconds=1.0, seed=64))
+    output_dir = tmp_path / "output"
+
+    def fail(self, audio, output_path=None):
+        with open(output_path, "wb") as f:
+            f.write(b"partial")
+        raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(AudioProcessor, "_export_processed_audio", fail)
+    assert AudioProcessor().process_directory(str(input_dir), str(output_dir), direct_output=True) == (0, 1)
+    assert os.listdir(output_dir) == []
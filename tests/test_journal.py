@@ -0,0 +1,33 @@
+from asrpro.journal import CheckpointJournal
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / "cache" / "journal.jsonl")
+    journal = CheckpointJournal(path)
+    journal.record_done("a.wav", "a_enhanced.wav")
+    journal.record_done("b.wav", "b_enhanced.wav")
+    journal.close()
+    # 进程在写最后一行时崩溃
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 10)
+
+    journal = CheckpointJournal(path)
+    assert journal.is_done("a.wav", "a_enhanced.wav")
+    assert not journal.is_done("b.wav", "b_enhanced.wav")
+    journal.record_done("c.wav", "c_enhanced.wav")
+    journal.close()
+    assert CheckpointJournal(path).is_done("c.wav", "c_enhanced.wav")
+
+
+def test_failed_entry_clears_done_status(tmp_path):
+    path = str(tmp_path / "cache" / "journal.jsonl")
+    journal = CheckpointJournal(path)
+    journal.record_done("a.wav", "a_enhanced.wav")
+    journal.record_failed("a.wav", "decoding failed")
+    assert not journal.is_done("a.wav", "a_enhanced.wav")
+    journal.close()
+
+    journal = CheckpointJournal(path)
+    assert not journal.is_done("a.wav", "a_enhanced.wav")
+    assert not journal.is_done("a.wav", "a_enhanced.flac")
+    journal.close()
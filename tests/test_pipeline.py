@@ -0,0 +1,63 @@
+import os
+import threading
+import pytest
+from asrpro import pipeline as pipeline_module
+from asrpro.processor import AudioProcessor
+from .signals import child_speech, write_wav
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    directory = tmp_path / "input"
+    directory.mkdir()
+    for seed in range(70, 76):
+        write_wav(directory / f"{seed}.wav", child_speech(seconds=1.0, seed=seed))
+    return directory
+
+
+def _run(input_dir, output_dir, output_format="wav", **kwargs):
+    """运行 process_directory；流水线卡住时测试失败而不是一直等待"""
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(
+            AudioProcessor(output_format=output_format).process_directory(str(input_dir), str(output_dir), **kwargs)
+        ),
+        daemon=True
+    )
+    thread.start()
+    thread.join(timeout=120)
+    assert not thread.is_alive(), "pipeline stalled"
+    return result[0]
+
+
+def _read_outputs(output_dir):
+    return {name: (output_dir / name).read_bytes() for name in sorted(os.listdir(output_dir))}
+
+
+@pytest.mark.parametrize("output_format", ["wav", "flac"])
+def test_pipelined_output_matches_serial(input_dir, tmp_path, output_format):
+    serial, pipelined = tmp_path / "serial", tmp_path / "pipelined"
+    assert _run(input_dir, serial, output_format) == (6, 0)
+    assert _run(input_dir, pipelined, output_format, pipelined=True,
+                decode_threads=2, encode_threads=2, queue_depth=1) == (6, 0)
+    assert _read_outputs(pipelined) == _read_outputs(serial)
+
+
+def test_pipelined_failures_are_counted_without_stalling(input_dir, tmp_path, monkeypatch):
+    # 解码失败：内容不是音频
+    (input_dir / "corrupt.wav").write_bytes(b"not audio" * 100)
+    # 编码失败：71.wav 的编码线程抛出异常
+    encode = pipeline_module.encode_pcm_data
+
+    def failing_encode(data, output_path, *args, **kwargs):
+        if "71_enhanced" in output_path:
+            raise RuntimeError("encoder crashed")
+        return encode(data, output_path, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline_module, "encode_pcm_data", failing_encode)
+    output_dir = tmp_path / "output"
+    processor_result = _run(input_dir, output_dir, pipelined=True, direct_output=True,
+                            decode_threads=1, encode_threads=1, queue_depth=1)
+    assert processor_result == (5, 2)
+    names = sorted(os.listdir(output_dir))
+    assert names == [f"{seed}_enhanced.wav" for seed in (70, 72, 73, 74, 75)]
@@ -0,0 +1,67 @@
+import wave
+import numpy as np
+from asrpro.processor import AudioProcessor
+from .signals import child_speech, write_wav
+
+
+def _read_wav(path):
+    with wave.open(path, "rb") as f:
+        assert (f.getnchannels(), f.getsampwidth(), f.getframerate()) == (1, 2, 16000)
+        return np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+
+
+def test_preprocess_keeps_length_and_format(tmp_path):
+    samples = child_speech(seconds=3.0, seed=5)
+    output = AudioProcessor().preprocess_audio(write_wav(tmp_path / "input.wav", samples))
+    assert output is not None
+    processed = _read_wav(output)
+    assert len(processed) == len(samples)
+    assert 0 < np.abs(processed.astype(np.int32)).max() <= 32767
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_output_does_not_depend_on_previous_files(tmp_path):
+    # 轻柔语音的判决对 webrtcvad 的自适应噪声估计最敏感
+    target = write_wav(tmp_path / "target.wav", child_speech(seconds=2.0, seed=14, level=0.02))
+    noise = np.random.RandomState(15).normal(0.0, 3000.0, 48000)
+    predecessors = [
+        write_wav(tmp_path / "noise.wav", noise.astype(np.int16)),
+        write_wav(tmp_path / "loud.wav", child_speech(seconds=3.0, seed=16, level=0.9)),
+    ]
+    expected = _read_bytes(AudioProcessor().preprocess_audio(target))
+    for predecessor in predecessors:
+        processor = AudioProcessor()
+        assert processor.preprocess_audio(predecessor) is not None
+        assert _read_bytes(processor.preprocess_audio(target)) == expected
+
+
+def test_worker_processes_match_serial_processing(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    write_wav(input_dir / "a.wav", np.random.RandomState(17).normal(0.0, 3000.0, 32000).astype(np.int16))
+    write_wav(input_dir / "b.wav", child_speech(seconds=2.0, seed=18, level=0.02))
+    write_wav(input_dir / "c.wav", child_speech(seconds=2.0, seed=19, level=0.9))
+
+    outputs = {}
+    for workers in (1, 2):
+        output_dir = tmp_path / f"output{workers}"
+        assert AudioProcessor().process_directory(str(input_dir), str(output_dir), workers=workers) == (3, 0)
+        outputs[workers] = {path.name: path.read_bytes() for path in output_dir.iterdir()}
+    assert outputs[1] == outputs[2]
+
+
+def test_memmapped_input_matches_audio_segment_path(tmp_path):
+    from pydub import AudioSegment
+    from asrpro.decoder import decode_file
+    from asrpro.processor import _dbfs
+
+    samples = child_speech(seconds=2.0, seed=20, level=0.05)
+    pcm = decode_file(write_wav(tmp_path / "input.wav", samples), 16000)
+    assert isinstance(pcm, np.memmap)
+    audio = AudioSegment(samples.tobytes(), frame_rate=16000, sample_width=2, channels=1)
+    assert _dbfs(pcm) == audio.dBFS
+    assert AudioProcessor()._process_pcm(pcm)[0].raw_data == AudioProcessor()._process_segment(audio)[0].raw_data
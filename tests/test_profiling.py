@@ -0,0 +1,58 @@
+import json
+import pytest
+from asrpro.processor import AudioProcessor
+from asrpro.profiling import NULL_PROFILER
+from .signals import child_speech, write_wav
+
+
+def test_processing_without_profiler_leaves_null_profiler_untouched(tmp_path):
+    path = write_wav(tmp_path / "input.wav", child_speech(seconds=1.0, seed=30))
+    assert AudioProcessor().preprocess_audio(path) is not None
+    assert AudioProcessor(streaming=True).preprocess_audio(path) is not None
+    assert not vars(NULL_PROFILER)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_report_times_active_stages_and_reports_peaks_per_worker(tmp_path, pipelined):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for seed in range(3):
+        write_wav(input_dir / f"{seed}.wav", child_speech(seconds=1.0, seed=31 + seed))
+    report_path = tmp_path / "report.json"
+    AudioProcessor().process_directory(
+        str(input_dir), str(tmp_path / "output"), report_path=str(report_path), pipelined=pipelined
+    )
+    report = json.loads(report_path.read_text())
+    records = report["outliers"]
+    assert len(records) == 3
+    for record in records:
+        assert record["audio_seconds"] == 1.0
+        assert record["peak_rss_growth_mb"] >= 0
+        if pipelined:
+            # 在队列中等待的时间不计入
+            assert record["total_seconds"] == pytest.approx(sum(record["stages"].values()))
+        else:
+            assert record["total_seconds"] >= sum(record["stages"].values())
+    assert list(report["worker_peak_rss_mb"].values()) == [report["peak_rss_mb"]]
+
+
+def test_stage_statistics_skip_files_that_did_not_run_the_stage():
+    from asrpro.profiling import RunReport
+
+    report = RunReport()
+    for seconds in (1.0, 3.0):
+        report.add({
+            "file": "dsp.wav", "pid": 1, "audio_seconds": 1.0, "total_seconds": seconds + 0.2,
+            "realtime_factor": seconds + 0.2, "stages": {"decode": 0.1, "vad": seconds, "export": 0.1},
+            "rss_mb": {}, "process_peak_rss_mb": None, "peak_rss_growth_mb": None,
+        })
+    # 复用缓存的中间结果：只有解码和导出
+    report.add({
+        "file": "cached.wav", "pid": 1, "audio_seconds": 1.0, "total_seconds": 0.2, "realtime_factor": 0.2,
+        "stages": {"decode": 0.1, "export": 0.1}, "rss_mb": {},
+        "process_peak_rss_mb": None, "peak_rss_growth_mb": None,
+    })
+    stages = report.to_dict()["stages"]
+    assert stages["vad"]["files"] == 2
+    assert stages["vad"]["p50"] == pytest.approx(2.0)
+    assert stages["decode"]["files"] == 3
@@ -0,0 +1,82 @@
+import os
+import numpy as np
+import pytest
+from asrpro.processor import AudioProcessor
+from asrpro.segments import Segmentation, export_segments, is_complete, manifest_files
+from asrpro.vad import VADResult
+from .signals import child_speech, write_wav
+
+
+def _vad(frames):
+    return VADResult(np.asarray(frames, dtype=bool), 30, 16000, len(frames) * 480)
+
+
+def test_reexport_removes_clips_no_longer_listed(tmp_path):
+    manifest_path = str(tmp_path / "a_enhanced.segments.json")
+    segmentation = Segmentation(padding_ms=0, min_speech_ms=0, max_gap_ms=0)
+    samples = child_speech(seconds=1.2, seed=50)
+    export_segments(samples, _vad([1] * 10 + [0] * 10 + [1] * 10 + [0] * 10), segmentation, "wav",
+                    manifest_path=manifest_path)
+    old = manifest_files(manifest_path)
+    assert len(old) == 2
+
+    export_segments(samples, _vad([1] * 10 + [0] * 30), segmentation, "wav", manifest_path=manifest_path)
+    new = manifest_files(manifest_path)
+    assert new == old[:1]
+    assert not os.path.exists(old[1])
+    assert is_complete(manifest_path)
+
+
+class _FailingSamples:
+    """读取到 fail_at 之后的样本时抛出异常（模拟编码中途中断）"""
+
+    def __init__(self, samples, fail_at):
+        self.samples = samples
+        self.fail_at = fail_at
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __getitem__(self, index):
+        if index.stop > self.fail_at:
+            raise KeyboardInterrupt
+        return self.samples[index]
+
+
+def test_interrupted_export_leaves_no_truncated_clip(tmp_path):
+    manifest_path = str(tmp_path / "a_enhanced.segments.json")
+    segmentation = Segmentation(padding_ms=0, min_speech_ms=0, max_gap_ms=0)
+    samples = child_speech(seconds=1.2, seed=52)
+    vad_result = _vad([1] * 10 + [0] * 10 + [1] * 10 + [0] * 10)
+    export_segments(samples, vad_result, segmentation, "wav", manifest_path=manifest_path)
+    first, second = manifest_files(manifest_path)
+    second_bytes = open(second, "rb").read()
+
+    with pytest.raises(KeyboardInterrupt):
+        export_segments(_FailingSamples(samples, 20 * 480), vad_result, segmentation, "wav",
+                        manifest_path=manifest_path)
+    # 中断的片段保持上一次的完整内容，没有残留的临时文件
+    assert open(second, "rb").read() == second_bytes
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+    assert not is_complete(manifest_path)
+
+
+def test_incremental_run_reprocesses_when_clip_is_missing(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    write_wav(input_dir / "a.wav", child_speech(seconds=3.0, seed=51))
+    output_dir = str(tmp_path / "output")
+
+    def run(**kwargs):
+        processor = AudioProcessor(segmentation=Segmentation())
+        assert processor.process_directory(str(input_dir), output_dir, **kwargs) == (1, 0)
+
+    run(incremental=True, resume=True)
+    manifest_path = os.path.join(output_dir, "a_enhanced.segments.json")
+    clips = manifest_files(manifest_path)
+    assert clips
+    for options in ({"incremental": True}, {"resume": True}):
+        os.remove(clips[0])
+        assert not is_complete(manifest_path)
+        run(**options)
+        assert is_complete(manifest_path)
@@ -0,0 +1,51 @@
+import asyncio
+import numpy as np
+from asrpro.processor import AudioProcessor
+from asrpro.realtime import RealtimeProcessor
+from asrpro.server import StreamServer
+from .signals import child_speech
+
+
+async def _stream(port, data, chunk):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for start in range(0, len(data), chunk):
+        writer.write(data[start:start + chunk])
+        await writer.drain()
+    writer.write_eof()
+    output = await reader.read()
+    writer.close()
+    return output
+
+
+def test_concurrent_streams_match_in_process_processing():
+    inputs = [child_speech(seconds=1.0, seed=40 + i).tobytes() for i in range(3)]
+    expected = []
+    for data in inputs:
+        stream = RealtimeProcessor(AudioProcessor(), frame_ms=20)
+        expected.append(stream.process(data) + stream.flush())
+
+    server = StreamServer(frame_ms=20, stats_interval=0, workers=2)
+
+    async def run():
+        server.start_workers()
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            # 读取大小不按帧对齐，检验帧间状态在工作进程中延续
+            return await asyncio.gather(*(_stream(port, data, 1000) for data in inputs))
+        finally:
+            listener.close()
+            await listener.wait_closed()
+
+    try:
+        outputs = asyncio.run(run())
+    finally:
+        server.close_workers()
+    assert outputs == expected
+    summary = server.summary()
+    assert summary["total_streams"] == 3 and summary["active_streams"] == 0
+    frames = sum(len(data) // 640 for data in inputs)
+    assert summary["frame_processing"]["frames"] == frames
+    assert 0 < summary["read_latency"]["reads"] <= frames
+    assert summary["estimated_capacity_streams"] is not None
+    assert np.frombuffer(outputs[0], dtype="<i2").any()
@@ -0,0 +1,61 @@
+import wave
+import numpy as np
+from asrpro.processor import AudioProcessor
+from .signals import child_speech, write_wav
+
+# 归一化之前流式与整段处理允许的最大差异 (int16 LSB)
+TOLERANCE = 1
+
+
+def _read_wav(path):
+    with wave.open(path, "rb") as f:
+        return np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").astype(np.int32)
+
+
+def _process(path, **kwargs):
+    output = AudioProcessor(**kwargs).preprocess_audio(path)
+    assert output is not None
+    return _read_wav(output)
+
+
+def test_streaming_matches_in_memory_before_gain(tmp_path, monkeypatch):
+    # 固定归一化增益为 0 dB，比较增益之前的 DSP 输出
+    monkeypatch.setattr(AudioProcessor, "_perceptual_gain", lambda self, peak, dbfs: 0.0)
+    # 长度不是块长度的整数倍，覆盖块边界和不足一帧的尾部
+    path = write_wav(tmp_path / "input.wav", child_speech(seconds=4.51, seed=6))
+    in_memory = _process(path)
+    streamed = _process(path, streaming=True, block_seconds=1)
+    assert len(streamed) == len(in_memory)
+    assert np.abs(streamed - in_memory).max() <= TOLERANCE
+
+
+def test_streaming_output_length(tmp_path):
+    samples = child_speech(seconds=2.5, seed=7)
+    streamed = _process(write_wav(tmp_path / "input.wav", samples), streaming=True, block_seconds=1)
+    assert len(streamed) == len(samples)
+
+
+def test_streaming_output_does_not_depend_on_previous_files(tmp_path):
+    target = write_wav(tmp_path / "target.wav", child_speech(seconds=2.0, seed=14, level=0.02))
+    noise = np.random.RandomState(15).normal(0.0, 3000.0, 48000)
+    predecessor = write_wav(tmp_path / "noise.wav", noise.astype(np.int16))
+
+    expected = _process(target, streaming=True, block_seconds=1)
+    processor = AudioProcessor(streaming=True, block_seconds=1)
+    assert processor.preprocess_audio(predecessor) is not None
+    np.testing.assert_array_equal(_read_wav(processor.preprocess_audio(target)), expected)
+
+
+def test_streaming_reads_blocks_instead_of_mapping_files(tmp_path, monkeypatch):
+    # 映射文件的页面计入常驻内存，峰值内存会随文件长度增长
+    from asrpro.segments import Segmentation
+
+    def fail(*args, **kwargs):
+        raise AssertionError("streaming mode must not memory-map files")
+
+    path = write_wav(tmp_path / "input.wav", child_speech(seconds=2.5, seed=8))
+    expected = _process(path, streaming=True, block_seconds=1)
+    monkeypatch.setattr(np, "memmap", fail)
+    assert np.array_equal(_process(path, streaming=True, block_seconds=1), expected)
+    processor = AudioProcessor(streaming=True, block_seconds=1, segmentation=Segmentation())
+    assert processor.preprocess_audio(path) is not None
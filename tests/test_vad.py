@@ -0,0 +1,47 @@
+import numpy as np
+import webrtcvad
+from asrpro.vad import detect_speech_frames, frame_size, speech_gain_envelope
+from .signals import child_speech
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = frame_size(SAMPLE_RATE, 30)
+WINDOW = np.hanning(50)
+
+
+def _convolved(gains):
+    """原实现：逐样本增益序列与归一化窗口卷积"""
+    mask = np.repeat(np.asarray(gains, dtype=np.float64), FRAME_SIZE)
+    return np.convolve(mask, WINDOW / WINDOW.sum(), "same")
+
+
+def test_envelope_matches_convolution():
+    rng = np.random.RandomState(8)
+    gains = np.where(rng.rand(200) > 0.5, 1.0, 0.3)
+    envelope = speech_gain_envelope(gains, FRAME_SIZE, WINDOW)
+    expected = _convolved(gains)
+    # 两端的卷积以零填充，不参与比较
+    edge = len(WINDOW)
+    np.testing.assert_allclose(envelope[edge:-edge], expected[edge:-edge], atol=1e-6)
+
+
+def test_envelope_split_matches_whole():
+    rng = np.random.RandomState(9)
+    gains = np.where(rng.rand(60) > 0.5, 1.0, 0.3).astype(np.float32)
+    whole = speech_gain_envelope(gains, FRAME_SIZE, WINDOW)
+    first = speech_gain_envelope(gains[:25], FRAME_SIZE, WINDOW, next_gain=gains[25])
+    second = speech_gain_envelope(gains[25:], FRAME_SIZE, WINDOW, prev_gain=gains[24])
+    np.testing.assert_allclose(np.concatenate([first, second]), whole, atol=1e-7)
+
+
+def test_detect_speech_frames_pads_partial_frame():
+    samples = child_speech(seconds=1.0, seed=10)
+    pcm = samples[:FRAME_SIZE * 20 + 100]
+    frames = detect_speech_frames(webrtcvad.Vad(3), pcm, SAMPLE_RATE, 30)
+    assert frames.dtype == bool
+    assert len(frames) == 21
+
+    vad = webrtcvad.Vad(3)
+    padded = np.zeros(FRAME_SIZE * 21, dtype=np.int16)
+    padded[:len(pcm)] = pcm
+    expected = [vad.is_speech(frame.tobytes(), SAMPLE_RATE) for frame in padded.reshape(21, FRAME_SIZE)]
+    assert frames.tolist() == expected